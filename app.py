@@ -1,16 +1,30 @@
+import itertools
+import uuid
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from transformers import pipeline
 
-# Optional Gemini import
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-    genai = None
+import backends
+import finance_engine
+from batching import get_inference_batcher
+from config import MODEL_CONFIG
+from conversation import ConversationMemory
+from dispatcher import FirstChunkTimeout, get_dispatcher
+from gemini_client import get_client_pool, get_key_validator, is_key_rejection, make_flight_key, stream_content
+from intents import classify_intent
+from local_model import get_local_generator
+from prompts import build_advisor_prompt, build_request_suffix
+from resilience import CircuitOpen, RateLimitExceeded, get_circuit_breaker, get_rate_limiter
+from response_cache import get_response_cache, make_cache_key, shared_profile
+from retrieval import answer_from_faq
+from templates import render_answer
+from upload_cache import file_digest, get_upload_cache, make_upload_key
+from utils import stream_text
+
+# Optional Gemini support - the SDK itself is imported on first use
+GEMINI_AVAILABLE = backends.is_available('gemini')
 
 # Page configuration
 st.set_page_config(
@@ -479,6 +493,13 @@ def apply_theme():
 # Initialize session state first
 if 'messages' not in st.session_state:
     st.session_state.messages = []
+if 'conversation' not in st.session_state:
+    # Bounded history for model prompts; `messages` is only used to render the chat
+    st.session_state.conversation = ConversationMemory(
+        recent_turns=MODEL_CONFIG['history_turns'],
+        token_budget=MODEL_CONFIG['history_token_budget'],
+        summary_tokens=MODEL_CONFIG['history_summary_tokens']
+    )
 if 'user_profile' not in st.session_state:
     st.session_state.user_profile = {}
 if 'budget_data' not in st.session_state:
@@ -492,15 +513,22 @@ if 'savings_goals' not in st.session_state:
 if 'risk_tolerance' not in st.session_state:
     st.session_state.risk_tolerance = 'moderate'
 if 'expense_history' not in st.session_state:
-    st.session_state.expense_history = []
+    st.session_state.expense_history = finance_engine.TransactionStore.empty()
+if 'expense_keys' not in st.session_state:
+    st.session_state.expense_keys = finance_engine.RowKeySet()
 if 'theme' not in st.session_state:
     st.session_state.theme = 'dark'
 if 'gemini_api_key' not in st.session_state:
     st.session_state.gemini_api_key = ''
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Apply the current theme after initialization
 apply_theme()
 
+# Optionally import heavy backends in the background so first use is fast
+backends.warm_up(MODEL_CONFIG['warm_up_backends'])
+
 def toggle_theme():
     """Toggle between dark and light themes"""
     st.session_state.theme = 'light' if st.session_state.theme == 'dark' else 'dark'
@@ -636,6 +664,9 @@ def render_home_section(assistant):
             
             if st.session_state.gemini_api_key:
                 st.success("🤖 **Gemini AI Enabled** - Enhanced responses active!")
+                cache_stats = get_response_cache().stats()
+                st.caption(f"Response cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+                           f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)")
             else:
                 st.info("🔧 **Fallback Mode** - Using rule-based responses. Add API key for AI-powered chat.")
     
@@ -653,22 +684,43 @@ def render_home_section(assistant):
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Generate response
+        # Generate response, rendering chunks as they arrive
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                context = ""
-                if st.session_state.budget_data:
-                    context = f"User's budget data: Income ₹{st.session_state.budget_data['income']:,}, Expenses ₹{st.session_state.budget_data['total_expenses']:,}, Savings ₹{st.session_state.budget_data['savings']:,}"
-                
-                response = assistant.generate_response(
+            context = ""
+            if st.session_state.budget_data:
+                context = finance_engine.budget_context(st.session_state.budget_data)
+            
+            hedge_ms = MODEL_CONFIG['hedge_ms']
+            if hedge_ms > 0 and assistant.gemini_enabled():
+                # Hedged: show the instant answer, swap in Gemini only if it starts in time
+                placeholder = st.empty()
+                response = assistant.generate_rule_based_response(prompt, st.session_state.user_profile)
+                placeholder.markdown(response)
+                chunks = assistant.stream_response(
+                    prompt,
+                    st.session_state.user_profile,
+                    context,
+                    first_chunk_timeout=hedge_ms / 1000,
+                    fallback=False
+                )
+                first_chunk = next(chunks, "")
+                if first_chunk:
+                    with placeholder.container():
+                        response = st.write_stream(itertools.chain([first_chunk], chunks))
+            else:
+                chunks = assistant.stream_response(
                     prompt, 
                     st.session_state.user_profile,
                     context
                 )
-                st.markdown(response)
+                # Keep the spinner only until the first chunk arrives
+                with st.spinner("Thinking..."):
+                    first_chunk = next(chunks, "")
+                response = st.write_stream(itertools.chain([first_chunk], chunks))
         
         # Add assistant response
         st.session_state.messages.append({"role": "assistant", "content": response})
+        st.session_state.conversation.add_turn(prompt, response)
 
 def render_profile_section():
     """Render the profile management section"""
@@ -758,15 +810,7 @@ def render_budget_section():
                     'Others': others
                 }
                 
-                total_expenses = sum(expenses.values())
-                savings = income - total_expenses
-                
-                st.session_state.budget_data = {
-                    'income': income,
-                    'expenses': expenses,
-                    'total_expenses': total_expenses,
-                    'savings': savings
-                }
+                st.session_state.budget_data = finance_engine.analyze_budget(income, expenses)
                 
                 st.success("Budget analyzed!")
                 st.rerun()
@@ -832,16 +876,11 @@ def render_analysis_section():
             analyze_month = st.form_submit_button("Analyze This Month", use_container_width=True)
             
             if analyze_month:
-                # Filter out zero expenses
-                filtered_expenses = {k: v for k, v in monthly_expenses.items() if v > 0}
+                # Zero expenses are left out of the analysis
+                analysis = finance_engine.summarize_month(selected_month, monthly_expenses)
                 
-                if filtered_expenses:
-                    st.session_state.monthly_analysis = {
-                        'month': selected_month,
-                        'expenses': filtered_expenses,
-                        'total': sum(filtered_expenses.values()),
-                        'timestamp': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M")
-                    }
+                if analysis:
+                    st.session_state.monthly_analysis = analysis
                     st.success(f"Analyzed expenses for {selected_month}!")
                     st.rerun()
                 else:
@@ -868,18 +907,7 @@ def render_goals_section():
             add_goal = st.form_submit_button("Add Goal", use_container_width=True)
             
             if add_goal and goal_name and target_amount > 0:
-                months_needed = target_amount / monthly_savings if monthly_savings > 0 else float('inf')
-                
-                new_goal = {
-                    'name': goal_name,
-                    'target': target_amount,
-                    'monthly_savings': monthly_savings,
-                    'current_saved': 0,
-                    'priority': priority,
-                    'months_needed': months_needed,
-                    'created_date': pd.Timestamp.now().strftime("%Y-%m-%d")
-                }
-                
+                new_goal = finance_engine.new_goal(goal_name, target_amount, monthly_savings, priority)
                 st.session_state.savings_goals.append(new_goal)
                 st.success(f"Added goal: {goal_name}!")
                 st.rerun()
@@ -940,58 +968,31 @@ def render_tools_section():
 
 class FinancialAssistant:
     def __init__(self):
+        self.gemini_client = None
         self.gemini_model = None
         self.setup_gemini()
     
     def validate_api_key(self, api_key):
-        """Validate Gemini API key by making a test request"""
+        """Validate Gemini API key by probing the models concurrently (results are cached)"""
         if not GEMINI_AVAILABLE or not api_key:
             return False, "Gemini package not available or no API key provided"
             
         try:
-            # Configure with the test API key
-            genai.configure(api_key=api_key)
-            
-            # Try to create a model and make a simple test request
-            model_names = ['gemini-1.5-flash', 'gemini-1.0-pro', 'gemini-pro']
-            
-            for model_name in model_names:
-                try:
-                    test_model = genai.GenerativeModel(model_name)
-                    # Make a simple test request
-                    response = test_model.generate_content("Hello")
-                    if response and response.text:
-                        return True, f"API key valid! Using model: {model_name}"
-                except Exception:
-                    continue
-            
-            return False, "API key invalid or no compatible models found"
+            is_valid, message, _ = get_key_validator().validate(api_key)
+            return is_valid, message
             
         except Exception as e:
             return False, f"API key validation failed: {str(e)}"
     
     def setup_gemini(self):
-        """Setup Gemini API if key is available"""
+        """Setup Gemini API if key is available, reusing the process-wide client pool"""
         if not GEMINI_AVAILABLE:
             return False
             
         if st.session_state.gemini_api_key:
             try:
-                genai.configure(api_key=st.session_state.gemini_api_key)
-                # Try different model names based on availability
-                model_names = ['gemini-1.5-flash', 'gemini-1.0-pro', 'gemini-pro']
-                model_created = False
-                
-                for model_name in model_names:
-                    try:
-                        self.gemini_model = genai.GenerativeModel(model_name)
-                        model_created = True
-                        break
-                    except Exception:
-                        continue
-                
-                if not model_created:
-                    raise Exception("No compatible Gemini model found")
+                self.gemini_client = get_client_pool().get(st.session_state.gemini_api_key)
+                self.gemini_model = self.gemini_client.model
                 return True
             except Exception as e:
                 st.error(f"Error setting up Gemini: {e}")
@@ -1000,213 +1001,170 @@ class FinancialAssistant:
     
     @st.cache_resource
     def load_model(_self):
-        """Load fallback model for text generation"""
+        """Load the local model (int8-quantized on CPU) for text generation"""
         try:
-            generator = pipeline(
-                "text-generation",
-                model="microsoft/DialoGPT-medium",
-                tokenizer="microsoft/DialoGPT-medium",
-                device=-1  # CPU
-            )
-            return generator
+            return get_local_generator()
         except Exception as e:
             st.error(f"Error loading model: {e}")
             return None
     
     def generate_response(self, user_input, user_profile, context=""):
         """Generate personalized financial advice using Gemini or fallback"""
-        # Try Gemini first if API key is available
-        if st.session_state.gemini_api_key and self.setup_gemini():
-            return self.generate_gemini_response(user_input, user_profile, context)
-        else:
+        return "".join(self.stream_response(user_input, user_profile, context))
+    
+    def stream_response(self, user_input, user_profile, context="", first_chunk_timeout=None, fallback=True):
+        """Stream personalized financial advice chunk by chunk using Gemini or fallback.
+
+        With fallback=False the stream is simply empty when Gemini cannot answer
+        (or has not started within first_chunk_timeout seconds), for callers that
+        already show the rule-based answer.
+        """
+        # Try Gemini first if API key is available (the model is set up once in __init__)
+        if self.gemini_enabled():
+            return self.stream_gemini_response(user_input, user_profile, context, first_chunk_timeout, fallback)
+        elif MODEL_CONFIG['local_model_enabled']:
+            return self.stream_local_response(user_input, user_profile, context, fallback)
+        elif fallback:
             # Fallback to rule-based response
-            return self.generate_rule_based_response(user_input, user_profile)
+            return self.stream_rule_based_response(user_input, user_profile)
+        return iter(())
+    
+    def gemini_enabled(self):
+        """Check whether chat turns should try Gemini at all"""
+        return bool(st.session_state.gemini_api_key) and (self.gemini_model is not None or self.setup_gemini())
+    
+    def build_gemini_prompt(self, user_input, user_profile, context=""):
+        """Build the advisor prompt sent to Gemini, including the bounded chat history"""
+        history = st.session_state.conversation.render()
+        # The static advisor prefix comes first so the API can match it across requests
+        return build_advisor_prompt(user_input, user_profile, context, history)
     
     def generate_gemini_response(self, user_input, user_profile, context=""):
         """Generate response using Gemini API"""
+        return "".join(self.stream_gemini_response(user_input, user_profile, context))
+    
+    def stream_gemini_response(self, user_input, user_profile, context="", first_chunk_timeout=None, fallback=True):
+        """Stream response chunks from Gemini API as they are produced"""
+        # Answers that depend on the user's own budget numbers or earlier turns are never shared
+        cache_key = None
+        prompt_profile = user_profile
+        if not context and not st.session_state.conversation:
+            cache_key = make_cache_key(user_input, user_profile, st.session_state.risk_tolerance)
+            cached = get_response_cache().get(cache_key)
+            if cached is not None:
+                yield from stream_text(cached)
+                return
+            # A shared answer may only see what its cache key holds, never one user's own details
+            prompt_profile = shared_profile(user_profile)
+        
+        chunks = []
         try:
-            demographic = user_profile.get('demographic', 'general')
-            age = user_profile.get('age', 'unknown')
-            income = user_profile.get('income', 'unknown')
-            goals = user_profile.get('goals', 'general financial wellness')
-            
-            prompt = f"""You are a helpful and knowledgeable financial advisor. Provide personalized financial advice based on the user's profile and question.
-
-User Profile:
-- Demographic: {demographic}
-- Age: {age}
-- Income: ₹{income}
-- Goals: {goals}
-
-User Question: {user_input}
-
-Context: {context}
-
-Please provide practical, actionable financial advice in a friendly and professional tone. Keep responses concise but informative. Use Indian currency (₹) and consider Indian financial context.
-
-Important: Always include a disclaimer that this is general advice and users should consult qualified financial professionals for personalized guidance."""
-            
-            response = self.gemini_model.generate_content(prompt)
-            return response.text
+            prompt = self.build_gemini_prompt(user_input, prompt_profile, context)
+            # Identical prompts for the same key share one upstream call across sessions
+            flight_key = make_flight_key(st.session_state.gemini_api_key, self.gemini_client.model_name, prompt)
+            client = self.gemini_client
+            session_id = st.session_state.session_id
+            
+            def start_upstream_call():
+                # Only new calls are checked; joining a call already in flight costs no extra quota
+                if not get_circuit_breaker().allow():
+                    raise CircuitOpen()
+                get_rate_limiter().acquire(session_id, MODEL_CONFIG['rate_limit_budget'])
+            
+            stream = get_dispatcher().stream(
+                flight_key,
+                lambda: stream_content(client, prompt),
+                on_done=lambda flight: self._finish_gemini_call(flight, cache_key),
+                first_chunk_timeout=first_chunk_timeout,
+                on_start=start_upstream_call
+            )
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            
+        except (CircuitOpen, FirstChunkTimeout):
+            # Gemini is unhealthy or too slow: answer from the rule-based engine without an error
+            if fallback:
+                yield from self.stream_rule_based_response(user_input, user_profile)
+            return
+            
+        except RateLimitExceeded:
+            # Overloaded: answer instantly from the rule-based engine instead of queueing
+            if fallback:
+                st.toast("⏳ The AI service is busy right now - here's a quick answer instead.")
+                yield from self.stream_rule_based_response(user_input, user_profile)
+            return
             
         except Exception as e:
-            st.error(f"Error with Gemini API: {e}")
-            return self.generate_rule_based_response(user_input, user_profile)
-    
-    def generate_rule_based_response(self, user_input, user_profile):
-        """Rule-based response generation as fallback"""
-        demographic = user_profile.get('demographic', 'general')
-        income = user_profile.get('income', 0)
+            if is_key_rejection(e):
+                # Revoked since validation: stop using the pooled client and ask for the key again
+                get_client_pool().discard(st.session_state.gemini_api_key)
+                st.session_state.gemini_api_key = ""
+                self.gemini_client = None
+                self.gemini_model = None
+            # Only fall back if nothing was shown yet, otherwise keep the partial answer
+            if fallback or chunks:
+                st.error(f"Error with Gemini API: {e}")
+            if fallback and not chunks:
+                yield from self.stream_rule_based_response(user_input, user_profile)
+    
+    @staticmethod
+    def _finish_gemini_call(flight, cache_key):
+        """Record a finished upstream call with the breaker and cache its answer.
         
-        user_input_lower = user_input.lower()
-        
-        # Savings-related queries
-        if any(word in user_input_lower for word in ['save', 'saving', 'savings']):
-            if demographic == 'student':
-                return """Great question! As a student, here are some practical saving tips:
-
-💡 **Start Small**: Try saving ₹500-1000 monthly by:
-- Cooking at home instead of ordering food
-- Using student discounts
-- Sharing subscriptions with friends
-- Walking/cycling instead of taking auto/cab
-
-📱 **For your goals**: If you're saving for something specific like a phone or laptop, break it down:
-- Phone (₹15,000): Save ₹2,500/month for 6 months
-- Laptop (₹40,000): Save ₹3,500/month for 12 months
-
-Would you like me to create a personalized budget plan for you?"""
-            else:
-                return f"""Based on your professional profile, here's a structured savings approach:
-
-💼 **The 50-30-20 Rule**:
-- 50% for needs (₹{income*0.5:,.0f})
-- 30% for wants (₹{income*0.3:,.0f})  
-- 20% for savings (₹{income*0.2:,.0f})
-
-🎯 **Investment Options**:
-- Emergency fund: 6 months expenses in savings account
-- SIP in index funds: ₹{min(income*0.1, 10000):,.0f}/month
-- PPF for tax savings: Up to ₹1.5 lakh/year
-
-Would you like a detailed investment breakdown?"""
-        
-        # Investment queries
-        elif any(word in user_input_lower for word in ['invest', 'investment', 'sip', 'mutual fund']):
-            risk_tolerance = st.session_state.risk_tolerance
-            
-            if demographic == 'student':
-                if risk_tolerance == 'conservative':
-                    return """As a student with conservative risk preference:
-
-🛡️ **Safe Start**:
-- Begin with ₹500/month in debt funds
-- Fixed deposits for emergency fund
-- PPF for long-term tax savings
-
-📚 **Learn & Grow**: 
-- Start with 80% debt, 20% equity
-- Use SIP to average out market volatility
-- Focus on large-cap funds initially"""
-                elif risk_tolerance == 'aggressive':
-                    return """As a student ready for higher risk:
-
-🚀 **Growth Focus**:
-- Start with ₹1000/month in equity funds
-- 70% equity, 30% debt allocation
-- Consider small-cap funds for higher returns
-
-⚡ **High Growth Strategy**:
-- Index funds + sectoral funds
-- Start early for compound growth advantage
-- Review and increase SIP annually"""
-                else:
-                    return """As a student with moderate risk appetite:
-
-⚖️ **Balanced Approach**:
-- Start with ₹500-1000/month SIP
-- 50% equity, 50% debt allocation
-- Mix of large-cap and mid-cap funds
-
-📈 **Steady Growth**: 
-- Use apps like Groww or Zerodha Coin
-- Increase investment as income grows
-- Focus on consistency over amount"""
-            else:
-                # Professional investment advice based on risk tolerance
-                if risk_tolerance == 'conservative':
-                    return f"""Conservative investment strategy for ₹{income:,} income:
-
-🛡️ **Low-Risk Portfolio**:
-- Debt funds (60%): ₹{income*0.12:,.0f}/month
-- Large-cap equity (30%): ₹{income*0.06:,.0f}/month  
-- Gold ETF (10%): ₹{income*0.02:,.0f}/month
-
-🏛️ **Tax-Efficient Options**:
-- PPF: ₹12,500/month for 15-year lock-in
-- ELSS: Tax-saving with 3-year lock-in
-- NSC/FD: For stable returns"""
-                elif risk_tolerance == 'aggressive':
-                    return f"""Aggressive growth strategy for ₹{income:,} income:
-
-🚀 **High-Growth Portfolio**:
-- Equity funds (70%): ₹{income*0.14:,.0f}/month
-- Mid/Small cap (20%): ₹{income*0.04:,.0f}/month
-- International funds (10%): ₹{income*0.02:,.0f}/month
-
-📈 **Growth Focus**:
-- Sectoral funds for higher returns
-- Direct equity for experienced investors
-- Regular portfolio rebalancing"""
-                else:
-                    return f"""Balanced investment strategy for ₹{income:,} income:
-
-⚖️ **Moderate Portfolio**:
-- Equity funds (60%): ₹{income*0.12:,.0f}/month
-- Debt funds (30%): ₹{income*0.06:,.0f}/month
-- Gold/International (10%): ₹{income*0.02:,.0f}/month
-
-🎯 **Tax-Saving Options**:
-- ELSS funds: Up to ₹1.5L under 80C
-- PPF: 15-year lock-in, tax-free returns
-- NPS: Additional ₹50K deduction under 80CCD"""
+        Runs on the dispatcher thread, so it also covers calls the chat stopped
+        waiting for (hedged or timed-out turns)."""
+        latency = flight.first_chunk_latency
+        if latency is None:
+            latency = flight.finished_at - flight.started_at
+        get_circuit_breaker().record(latency, flight.error is None)
+        if cache_key and flight.error is None and flight.chunks:
+            get_response_cache().put(cache_key, flight.text)
+    
+    def stream_local_response(self, user_input, user_profile, context="", fallback=True):
+        """Stream an answer generated by the local CPU model"""
+        generator = self.load_model()
+        if generator is None:
+            if fallback:
+                yield from self.stream_rule_based_response(user_input, user_profile)
+            return
         
-        # Budget queries
-        elif any(word in user_input_lower for word in ['budget', 'expense', 'spending']):
-            return """I'd love to help you create a budget! 
-
-📝 **Let's gather your financial info**:
-- Monthly income
-- Fixed expenses (rent, utilities, EMIs)
-- Variable expenses (food, transport, entertainment)
-- Savings goals
-
-You can either:
-1. Tell me your numbers in chat
-2. Use the budget form in the sidebar
-
-Once I have your data, I'll create:
-- Visual budget breakdown
-- Spending analysis
-- Personalized recommendations"""
+        try:
+            # The generator already holds the advisor prefix (and its key/value cache)
+            history = st.session_state.conversation.render(generator.count_tokens)
+            prompt = build_request_suffix(user_input, user_profile, context, history)
+            # Concurrent sessions share batched generation on the local model
+            response = get_inference_batcher().generate(prompt, timeout=MODEL_CONFIG['llm_request_timeout'])
+        except Exception as e:
+            st.error(f"Local model error: {e}")
+            if fallback:
+                yield from self.stream_rule_based_response(user_input, user_profile)
+            return
         
-        # General greeting or unclear query
-        else:
-            return f"""Hello! I'm your personal finance assistant. 
-
-Based on your profile ({demographic}), I can help you with:
-- 💰 Savings strategies
-- 📈 Investment advice  
-- 📊 Budget planning
-- 💡 Spending insights
-
-What would you like to know about? Feel free to ask questions like:
-- "How do I save for a laptop?"
-- "What investments should I consider?"
-- "Help me create a budget"
-- "How much should I spend on entertainment?"
-
-I'm here to provide personalized advice based on your situation!"""
+        if response:
+            yield from stream_text(response)
+        elif fallback:
+            yield from self.stream_rule_based_response(user_input, user_profile)
+    
+    def stream_rule_based_response(self, user_input, user_profile):
+        """Stream the rule-based response through the same chunked interface as Gemini"""
+        return stream_text(self.generate_rule_based_response(user_input, user_profile))
+    
+    def generate_rule_based_response(self, user_input, user_profile):
+        """Rule-based response generation as fallback"""
+        intent = classify_intent(user_input)
+        if intent == 'general':
+            # Questions outside the known intents get the closest curated FAQ answer
+            answer = answer_from_faq(user_input)
+            if answer:
+                return answer
+        return render_answer(
+            intent,
+            user_profile.get('demographic', 'general'),
+            st.session_state.risk_tolerance,
+            user_profile.get('income', 0),
+            user_profile.get('age', 25)
+        )
 
 def display_budget_analysis():
     """Display budget analysis with charts"""
@@ -1227,12 +1185,10 @@ def display_budget_analysis():
         st.metric("Total Expenses", f"₹{data['total_expenses']:,}")
     
     with col3:
-        savings_rate = (data['savings'] / data['income'] * 100) if data['income'] > 0 else 0
-        st.metric("Savings", f"₹{data['savings']:,}", f"{savings_rate:.1f}%")
+        st.metric("Savings", f"₹{data['savings']:,}", f"{data['savings_rate']:.1f}%")
     
     with col4:
-        expense_ratio = (data['total_expenses'] / data['income'] * 100) if data['income'] > 0 else 0
-        st.metric("Expense Ratio", f"{expense_ratio:.1f}%")
+        st.metric("Expense Ratio", f"{data['expense_ratio']:.1f}%")
     
     # Charts
     col1, col2 = st.columns(2)
@@ -1262,41 +1218,10 @@ def display_budget_analysis():
     generate_budget_insights(data)
 
 def generate_budget_insights(data):
-    """Generate spending insights and recommendations"""
+    """Display spending insights and recommendations"""
     st.header("💡 Spending Insights")
     
-    income = data['income']
-    expenses = data['expenses']
-    savings_rate = (data['savings'] / income * 100) if income > 0 else 0
-    
-    insights = []
-    recommendations = []
-    
-    # Savings rate analysis
-    if savings_rate < 10:
-        insights.append("⚠️ Your savings rate is below 10% - this is concerning for long-term financial health.")
-        recommendations.append("Try to increase your savings to at least 20% of income.")
-    elif savings_rate < 20:
-        insights.append("📈 Your savings rate is decent but could be improved.")
-        recommendations.append("Aim for 20-30% savings rate for better financial security.")
-    else:
-        insights.append("✅ Excellent savings rate! You're on track for good financial health.")
-    
-    # Category-wise analysis
-    for category, amount in expenses.items():
-        percentage = (amount / income * 100) if income > 0 else 0
-        
-        if category == 'Rent/Housing' and percentage > 30:
-            insights.append(f"🏠 Housing costs ({percentage:.1f}%) are high - ideally should be under 30%.")
-            recommendations.append("Consider finding more affordable housing or getting roommates.")
-        
-        elif category == 'Food & Groceries' and percentage > 15:
-            insights.append(f"🍽️ Food expenses ({percentage:.1f}%) are above recommended 10-15%.")
-            recommendations.append("Try meal planning and cooking at home more often.")
-        
-        elif category == 'Entertainment' and percentage > 10:
-            insights.append(f"🎬 Entertainment spending ({percentage:.1f}%) is quite high.")
-            recommendations.append("Look for free or low-cost entertainment options.")
+    insights, recommendations = finance_engine.budget_insights(data)
     
     # Display insights
     for insight in insights:
@@ -1321,17 +1246,14 @@ def display_savings_goals():
             col1, col2, col3 = st.columns([3, 1, 1])
             
             with col1:
-                progress = min(goal['current_saved'] / goal['target'], 1.0)
+                status = finance_engine.goal_progress(goal)
                 st.markdown(f"### {goal['name']}")
-                st.progress(progress)
-                
-                remaining = max(goal['target'] - goal['current_saved'], 0)
-                months_remaining = remaining / goal['monthly_savings'] if goal['monthly_savings'] > 0 else float('inf')
+                st.progress(status['progress'])
                 
                 st.markdown(f"""
-                **Target:** ₹{goal['target']:,} | **Saved:** ₹{goal['current_saved']:,} | **Remaining:** ₹{remaining:,}
+                **Target:** ₹{goal['target']:,} | **Saved:** ₹{goal['current_saved']:,} | **Remaining:** ₹{status['remaining']:,}
                 
-                **Progress:** {progress*100:.1f}% | **Months to go:** {months_remaining:.1f}
+                **Progress:** {status['progress']*100:.1f}% | **Months to go:** {status['months_remaining']:.1f}
                 """)
             
             with col2:
@@ -1344,6 +1266,30 @@ def display_savings_goals():
         
         st.divider()
 
+def upload_digest(uploaded_file):
+    """Content hash of an uploaded file, computed once per upload"""
+    digests = st.session_state.setdefault('upload_digests', {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = file_digest(uploaded_file.getbuffer())
+    return digests[uploaded_file.file_id]
+
+def analyze_upload(uploaded_file, digest, amount_col, category_col, date_col, description_col=None):
+    """Stream an upload into totals, reusing the cached result for the same file and mapping"""
+    cache = get_upload_cache()
+    key = make_upload_key(digest, 'analysis', amount_col, category_col, date_col, description_col)
+    analysis = cache.get(key)
+    if analysis is None:
+        progress = st.progress(0.0, text="Reading file...")
+        uploaded_file.seek(0)
+        totals, df_clean = finance_engine.stream_transactions(
+            uploaded_file, amount_col, category_col, date_col, description_col,
+            on_progress=lambda fraction, rows: progress.progress(fraction, text=f"Processed {rows:,} rows")
+        )
+        progress.empty()
+        analysis = {'summary': totals.summary(), 'transactions': df_clean}
+        cache.put(key, analysis)
+    return analysis
+
 def csv_expense_uploader():
     """CSV expense upload and analysis"""
     st.header("📁 Upload Expense Data")
@@ -1352,12 +1298,21 @@ def csv_expense_uploader():
     
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
+            # Reruns (e.g. changing the column mapping) reuse the parsed preview and analysis
+            digest = upload_digest(uploaded_file)
+            cache = get_upload_cache()
+            preview_key = make_upload_key(digest, 'preview')
+            df = cache.get(preview_key)
+            if df is None:
+                # Only the first rows are parsed here; the analysis streams the whole file
+                uploaded_file.seek(0)
+                df = finance_engine.read_preview(uploaded_file)
+                cache.put(preview_key, df)
             st.success("File uploaded successfully!")
             
             # Display sample data
             st.subheader("📋 Data Preview")
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(df, use_container_width=True)
             
             # Column mapping
             st.subheader("🔗 Map Columns")
@@ -1366,59 +1321,72 @@ def csv_expense_uploader():
             with col1:
                 amount_col = st.selectbox("Amount Column", df.columns)
             with col2:
-                category_col = st.selectbox("Category Column", df.columns)
+                category_col = st.selectbox("Category Column", list(df.columns) + ["(from description)"])
             with col3:
                 date_col = st.selectbox("Date Column", df.columns)
             
+            # The description tells otherwise identical transactions apart when skipping re-uploaded rows,
+            # and fills in the category of rows that have none
+            description_options = ["(none)"] + list(df.columns)
+            description_col = st.selectbox(
+                "Description Column (optional)", description_options,
+                index=description_options.index("Description") if "Description" in description_options else 0
+            )
+            if description_col == "(none)":
+                description_col = None
+            if category_col == "(from description)":
+                category_col = None
+                if description_col is None:
+                    st.warning("Choose a description column to categorize transactions from.")
+                    return
+            append = st.checkbox("Append to my expense history (skip rows already uploaded)", value=True)
+            
             if st.button("Analyze Uploaded Data"):
-                # Process the data
-                df_clean = df[[amount_col, category_col, date_col]].copy()
-                df_clean.columns = ['Amount', 'Category', 'Date']
+                analysis = analyze_upload(uploaded_file, digest, amount_col, category_col, date_col, description_col)
+                summary, transactions = analysis['summary'], analysis['transactions']
                 
-                # Clean and convert amount column
-                df_clean['Amount'] = pd.to_numeric(df_clean['Amount'], errors='coerce')
+                if summary['dropped']:
+                    st.info(f"Removed {summary['dropped']} rows with invalid data.")
                 
-                # Convert date column
-                try:
-                    df_clean['Date'] = pd.to_datetime(df_clean['Date'], errors='coerce')
-                except Exception as e:
-                    st.warning(f"Date format not recognized: {str(e)}. Using original date values.")
-                
-                # Remove rows with invalid data
-                initial_rows = len(df_clean)
-                df_clean = df_clean.dropna(subset=['Amount'])
-                final_rows = len(df_clean)
-                
-                if initial_rows > final_rows:
-                    st.info(f"Removed {initial_rows - final_rows} rows with invalid data.")
-                
-                if len(df_clean) == 0:
+                if summary['count'] == 0:
                     st.error("No valid data found after cleaning. Please check your data format.")
                     return
                 
-                # Store in session state
-                st.session_state.expense_history = df_clean.to_dict('records')
+                # Store in session state, as compact columns rather than one dict per row
+                if transactions is not None and append:
+                    history, added = st.session_state.expense_history.append_new(
+                        transactions, st.session_state.expense_keys
+                    )
+                    st.session_state.expense_history = history
+                    st.caption(f"Added {added:,} new transactions, skipped {len(transactions) - added:,} already "
+                               f"uploaded; history holds {len(history):,} in {history.nbytes / 1024:,.0f} KB")
+                elif transactions is not None:
+                    st.session_state.expense_history = transactions
+                    st.session_state.expense_keys = finance_engine.RowKeySet(transactions.keys)
+                    st.caption(f"Stored {len(transactions):,} transactions in {transactions.nbytes / 1024:,.0f} KB "
+                               f"(parsed at {summary['bytes_per_row']:.0f} bytes/row)")
+                else:
+                    if not append:
+                        st.session_state.expense_history = finance_engine.TransactionStore.empty()
+                        st.session_state.expense_keys = finance_engine.RowKeySet()
+                    st.info(f"Large file: only the totals of its {summary['count']:,} transactions are kept.")
                 
                 # Display analysis
                 st.subheader("📊 Expense Analysis")
                 
-                total_expenses = df_clean['Amount'].sum()
-                avg_expense = df_clean['Amount'].mean()
-                max_expense = df_clean['Amount'].max()
-                
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Total Expenses", f"₹{total_expenses:,.0f}")
+                    st.metric("Total Expenses", f"₹{summary['total']:,.0f}")
                 with col2:
-                    st.metric("Average Expense", f"₹{avg_expense:,.0f}")
+                    st.metric("Average Expense", f"₹{summary['average']:,.0f}")
                 with col3:
-                    st.metric("Highest Expense", f"₹{max_expense:,.0f}")
+                    st.metric("Highest Expense", f"₹{summary['max']:,.0f}")
                 with col4:
-                    st.metric("Transactions", len(df_clean))
+                    st.metric("Transactions", summary['count'])
                 
                 # Category breakdown
-                if len(df_clean) > 0:
-                    category_summary = df_clean.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+                if summary['count'] > 0:
+                    category_summary = summary['by_category']
                     
                     # Create bar chart
                     fig_category = px.bar(
@@ -1449,9 +1417,14 @@ def csv_expense_uploader():
                     
                     # Show top categories
                     st.subheader("💰 Top Spending Categories")
-                    for i, (category, amount) in enumerate(category_summary.head(5).items(), 1):
-                        percentage = (amount / total_expenses) * 100
+                    for i, (category, amount, percentage) in enumerate(summary['top_categories'], 1):
                         st.write(f"{i}. **{category}**: ₹{amount:,.0f} ({percentage:.1f}%)")
+                    
+                    # Labels differ between banks, so spending is also shown per budget guideline
+                    st.subheader("📐 Spending by Budget Guideline")
+                    for guideline, amount in summary['by_guideline'].items():
+                        share = amount / summary['total'] * 100 if summary['total'] else 0
+                        st.write(f"- **{guideline.title()}**: ₹{amount:,.0f} ({share:.1f}%)")
                 
                 st.success("✅ Data analyzed successfully! You can now ask the chatbot about your expenses.")
                 
@@ -1466,39 +1439,33 @@ def what_if_simulator():
         st.warning("Please set up your profile first!")
         return
     
-    current_income = st.session_state.user_profile.get('income', 0)
-    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📈 Income Change Simulation")
         income_change = st.slider("Income Change (%)", -50, 100, 0)
-        new_income = current_income * (1 + income_change/100)
-        
-        st.metric("New Monthly Income", f"₹{new_income:,.0f}", f"{income_change:+.0f}%")
-        
-        if st.session_state.budget_data:
-            current_expenses = st.session_state.budget_data.get('total_expenses', 0)
-            new_savings = new_income - current_expenses
-            savings_change = new_savings - st.session_state.budget_data.get('savings', 0)
-            
-            st.metric("New Monthly Savings", f"₹{new_savings:,.0f}", f"₹{savings_change:+,.0f}")
     
     with col2:
         st.subheader("💸 Expense Reduction Simulation")
         expense_reduction = st.slider("Expense Reduction (%)", 0, 50, 0)
+    
+    scenario = finance_engine.simulate_what_if(
+        st.session_state.user_profile.get('income', 0),
+        income_change,
+        expense_reduction,
+        st.session_state.budget_data
+    )
+    
+    with col1:
+        st.metric("New Monthly Income", f"₹{scenario['new_income']:,.0f}", f"{income_change:+.0f}%")
         
         if st.session_state.budget_data:
-            current_expenses = st.session_state.budget_data.get('total_expenses', 0)
-            new_expenses = current_expenses * (1 - expense_reduction/100)
-            expense_savings = current_expenses - new_expenses
-            
-            st.metric("New Monthly Expenses", f"₹{new_expenses:,.0f}", f"-₹{expense_savings:,.0f}")
-            
-            new_total_savings = current_income - new_expenses
-            additional_savings = new_total_savings - st.session_state.budget_data.get('savings', 0)
-            
-            st.metric("Additional Savings", f"₹{additional_savings:,.0f}")
+            st.metric("New Monthly Savings", f"₹{scenario['new_savings']:,.0f}", f"₹{scenario['savings_change']:+,.0f}")
+    
+    with col2:
+        if st.session_state.budget_data:
+            st.metric("New Monthly Expenses", f"₹{scenario['new_expenses']:,.0f}", f"-₹{scenario['expense_savings']:,.0f}")
+            st.metric("Additional Savings", f"₹{scenario['additional_savings']:,.0f}")
 
 def spending_alerts():
     """Generate spending alerts and anomaly detection"""
@@ -1508,35 +1475,7 @@ def spending_alerts():
     
     st.header("🚨 Spending Alerts")
     
-    alerts = []
-    
-    # Budget-based alerts
-    if st.session_state.budget_data:
-        data = st.session_state.budget_data
-        income = data.get('income', 0)
-        
-        for category, amount in data.get('expenses', {}).items():
-            percentage = (amount / income * 100) if income > 0 else 0
-            
-            if category == 'Rent/Housing' and percentage > 30:
-                alerts.append(f"🏠 **Housing Alert**: {percentage:.1f}% of income (recommended: <30%)")
-            elif category == 'Food & Groceries' and percentage > 15:
-                alerts.append(f"🍽️ **Food Alert**: {percentage:.1f}% of income (recommended: <15%)")
-            elif category == 'Entertainment' and percentage > 10:
-                alerts.append(f"🎬 **Entertainment Alert**: {percentage:.1f}% of income (recommended: <10%)")
-    
-    # Monthly analysis alerts
-    if st.session_state.monthly_analysis:
-        data = st.session_state.monthly_analysis
-        expenses = data.get('expenses', {})
-        
-        if expenses:
-            total = sum(expenses.values())
-            max_expense = max(expenses.values())
-            max_category = max(expenses, key=expenses.get)
-            
-            if max_expense / total > 0.5:
-                alerts.append(f"⚠️ **Concentration Alert**: {max_category} represents {(max_expense/total*100):.1f}% of total expenses")
+    alerts = finance_engine.spending_alerts(st.session_state.budget_data, st.session_state.monthly_analysis)
     
     # Display alerts
     if alerts:
@@ -1549,6 +1488,8 @@ def investment_calculator():
     """Investment calculator with risk-based recommendations"""
     st.header("📈 Investment Calculator")
     
+    risk_tolerance = st.session_state.risk_tolerance
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -1556,58 +1497,18 @@ def investment_calculator():
         monthly_investment = st.number_input("Monthly Investment (₹)", min_value=0, value=5000, step=500)
         investment_period = st.number_input("Investment Period (Years)", min_value=1, value=10, step=1)
         
-        # Risk-based returns
-        risk_tolerance = st.session_state.risk_tolerance
-        if risk_tolerance == 'conservative':
-            expected_return = 7
-            st.info("Conservative: 7% expected annual return")
-        elif risk_tolerance == 'moderate':
-            expected_return = 10
-            st.info("Moderate: 10% expected annual return")
-        else:
-            expected_return = 13
-            st.info("Aggressive: 13% expected annual return")
+        plan = finance_engine.sip_plan(monthly_investment, investment_period, risk_tolerance)
+        st.info(f"{risk_tolerance.title()}: {plan['expected_return']}% expected annual return")
     
     with col2:
         st.subheader("📊 Investment Projections")
-        
-        # Calculate compound interest
-        total_invested = monthly_investment * 12 * investment_period
-        monthly_rate = expected_return / 100 / 12
-        total_months = investment_period * 12
-        
-        # SIP future value formula
-        if monthly_rate > 0:
-            future_value = monthly_investment * (((1 + monthly_rate) ** total_months - 1) / monthly_rate) * (1 + monthly_rate)
-        else:
-            future_value = total_invested
-        
-        returns = future_value - total_invested
-        
-        st.metric("Total Invested", f"₹{total_invested:,.0f}")
-        st.metric("Expected Returns", f"₹{returns:,.0f}")
-        st.metric("Final Amount", f"₹{future_value:,.0f}")
+        st.metric("Total Invested", f"₹{plan['total_invested']:,.0f}")
+        st.metric("Expected Returns", f"₹{plan['returns']:,.0f}")
+        st.metric("Final Amount", f"₹{plan['future_value']:,.0f}")
         
         # Investment allocation based on risk tolerance
         st.subheader("🎯 Recommended Allocation")
-        if risk_tolerance == 'conservative':
-            st.markdown("""
-            - **60%** Debt Funds/FDs
-            - **30%** Large Cap Equity
-            - **10%** Gold ETF
-            """)
-        elif risk_tolerance == 'moderate':
-            st.markdown("""
-            - **50%** Equity Funds
-            - **30%** Debt Funds
-            - **20%** International/Gold
-            """)
-        else:
-            st.markdown("""
-            - **70%** Equity Funds
-            - **20%** Mid/Small Cap
-            - **10%** Debt Funds
-            """)
+        st.markdown("\n".join(f"- **{percent}%** {asset}" for percent, asset in plan['allocation']))
 
 def display_monthly_analysis():
     """Display monthly analysis with visualizations"""
@@ -1627,13 +1528,10 @@ def display_monthly_analysis():
         st.metric("Total Expenses", f"₹{data['total']:,}")
     
     with col2:
-        avg_per_category = data['total'] / len(data['expenses']) if data['expenses'] else 0
-        st.metric("Avg per Category", f"₹{avg_per_category:,.0f}")
+        st.metric("Avg per Category", f"₹{data['average']:,.0f}")
     
     with col3:
-        highest_expense = max(data['expenses'].values()) if data['expenses'] else 0
-        highest_category = max(data['expenses'], key=data['expenses'].get) if data['expenses'] else "None"
-        st.metric("Highest Expense", f"₹{highest_expense:,}", f"{highest_category}")
+        st.metric("Highest Expense", f"₹{data['top_amount']:,}", f"{data['top_category']}")
     
     # Visualizations
     col1, col2 = st.columns(2)
@@ -1679,8 +1577,8 @@ def display_monthly_analysis():
     st.subheader("💰 Detailed Breakdown")
     if data['expenses']:
         expense_df = pd.DataFrame([
-            {"Category": cat, "Amount": f"₹{amt:,}", "Percentage": f"{(amt/data['total']*100):.1f}%"}
-            for cat, amt in sorted(data['expenses'].items(), key=lambda x: x[1], reverse=True)
+            {"Category": cat, "Amount": f"₹{amt:,}", "Percentage": f"{pct:.1f}%"}
+            for cat, amt, pct in finance_engine.monthly_breakdown(data)
         ])
         st.dataframe(expense_df, use_container_width=True, hide_index=True)
     
@@ -1688,60 +1586,18 @@ def display_monthly_analysis():
     generate_monthly_insights(data)
 
 def generate_monthly_insights(data):
-    """Generate insights for monthly analysis"""
+    """Display insights for monthly analysis"""
     st.subheader("💡 Monthly Insights")
     
     if not data['expenses']:
         return
     
-    total = data['total']
-    expenses = data['expenses']
-    
-    # Find top spending categories
-    sorted_expenses = sorted(expenses.items(), key=lambda x: x[1], reverse=True)
-    top_category = sorted_expenses[0] if sorted_expenses else None
-    
-    insights = []
-    
-    if top_category:
-        percentage = (top_category[1] / total * 100)
-        insights.append(f"🔝 **{top_category[0]}** is your highest expense at ₹{top_category[1]:,} ({percentage:.1f}% of total)")
-    
-    # Check for balanced spending
-    if len(expenses) > 1:
-        amounts = list(expenses.values())
-        avg_amount = sum(amounts) / len(amounts)
-        high_variance = any(amt > avg_amount * 2 for amt in amounts)
-        
-        if high_variance:
-            insights.append("⚖️ **Unbalanced spending** detected - some categories are significantly higher than others")
-        else:
-            insights.append("✅ **Balanced spending** across categories")
+    insights, recommendations = finance_engine.monthly_insights(data)
     
-    # Spending pattern analysis
-    if total > 0:
-        if len(expenses) <= 3:
-            insights.append("📊 **Focused spending** - You track expenses in few categories")
-        elif len(expenses) > 6:
-            insights.append("📈 **Diverse spending** - You have expenses across many categories")
-    
-    # Display insights
     for insight in insights:
         st.markdown(f"- {insight}")
     
-    # Recommendations
     st.subheader("🎯 Recommendations")
-    recommendations = []
-    
-    if top_category and (top_category[1] / total) > 0.4:
-        recommendations.append(f"Consider reducing spending in **{top_category[0]}** as it takes up a large portion of your budget")
-    
-    if len(expenses) > 8:
-        recommendations.append("Try consolidating similar expense categories for better tracking")
-    
-    recommendations.append("Set monthly limits for each category to stay within budget")
-    recommendations.append("Review and update your categories monthly to reflect changing spending patterns")
-    
     for rec in recommendations:
         st.markdown(f"- {rec}")
 
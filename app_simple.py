@@ -2,6 +2,11 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 
+import finance_engine
+from intents import classify_intent
+from retrieval import answer_from_faq
+from templates import render_answer
+
 # Page configuration
 st.set_page_config(
     page_title="Personal Finance Assistant",
@@ -255,231 +260,18 @@ class FinancialAssistant:
     
     def generate_response(self, user_input, user_profile, context=""):
         """Generate personalized financial advice using rule-based logic"""
-        demographic = user_profile.get('demographic', 'general')
-        income = user_profile.get('income', 0)
-        age = user_profile.get('age', 25)
-        
-        user_input_lower = user_input.lower()
-        
-        # Savings-related queries
-        if any(word in user_input_lower for word in ['save', 'saving', 'savings', 'laptop', 'phone']):
-            if demographic == 'student':
-                return f"""Great question! As a student, here are some practical saving tips:
-
-💡 **Start Small**: Try saving ₹500-1000 monthly by:
-- Cooking at home instead of ordering food (save ₹2000+/month)
-- Using student discounts everywhere
-- Sharing subscriptions with friends
-- Walking/cycling instead of taking auto/cab
-
-📱 **For specific goals**:
-- Laptop (₹40,000): Save ₹3,500/month for 12 months
-- Phone (₹15,000): Save ₹2,500/month for 6 months
-- Emergency fund: Start with ₹500/month
-
-🎯 **Pro tip**: Use the 50-30-20 rule adapted for students:
-- 50% for essentials (₹{income*0.5:,.0f})
-- 30% for fun/wants (₹{income*0.3:,.0f})
-- 20% for savings (₹{income*0.2:,.0f})
-
-Would you like me to create a personalized budget plan for you?"""
-            else:
-                return f"""Based on your professional profile, here's a structured savings approach:
-
-💼 **The 50-30-20 Rule**:
-- 50% for needs (₹{income*0.5:,.0f})
-- 30% for wants (₹{income*0.3:,.0f})  
-- 20% for savings (₹{income*0.2:,.0f})
-
-🎯 **Investment Options**:
-- Emergency fund: 6 months expenses in high-yield savings
-- SIP in index funds: ₹{min(income*0.1, 15000):,.0f}/month
-- PPF for tax savings: Up to ₹1.5 lakh/year
-- ELSS funds: Tax-saving mutual funds
-
-📈 **Advanced strategies**:
-- Diversify across large-cap, mid-cap, and international funds
-- Consider debt funds for stability
-- Use systematic transfer plans (STP) for better timing
-
-Would you like a detailed investment breakdown based on your ₹{income:,} income?"""
-        
-        # Investment queries
-        elif any(word in user_input_lower for word in ['invest', 'investment', 'sip', 'mutual fund', 'portfolio']):
-            if demographic == 'student':
-                return """As a student, start with these simple investment steps:
-
-🌱 **Begin Small**:
-- Start with ₹500-1000/month SIP
-- Choose index funds (low cost, diversified)
-- Use apps like Groww, Zerodha Coin, or Paytm Money
-
-📚 **Learn First**: 
-- Understand risk vs returns
-- Start with large-cap funds (safer for beginners)
-- Avoid individual stock picking initially
-- Read about compound interest - it's magical! ✨
-
-🎯 **Sample portfolio for students**:
-- 70% Large-cap index funds
-- 20% Mid-cap funds
-- 10% International funds
-
-Remember: Time in market > timing the market!"""
-            else:
-                return f"""Here's a professional investment strategy for your ₹{income:,} monthly income:
-
-📊 **Asset Allocation by Age ({age} years)**:
-- Equity: {100-age}% (₹{income*(100-age)/100*0.2:,.0f}/month)
-- Debt: {age}% (₹{income*age/100*0.2:,.0f}/month)
-
-🏛️ **Tax-Saving Options**:
-- ELSS funds: Up to ₹1.5L under Section 80C
-- PPF: 15-year lock-in, tax-free returns
-- NPS: Additional ₹50K deduction under 80CCD(1B)
-- ULIP: Insurance + investment (consider carefully)
-
-💰 **Monthly Investment Plan**:
-- Large-cap funds: ₹{income*0.08:,.0f}
-- Mid-cap funds: ₹{income*0.05:,.0f}
-- International funds: ₹{income*0.03:,.0f}
-- Debt funds: ₹{income*0.04:,.0f}
-
-Want me to create a detailed portfolio allocation?"""
-        
-        # Budget queries
-        elif any(word in user_input_lower for word in ['budget', 'expense', 'spending', 'money']):
-            return """I'd love to help you create a comprehensive budget! 📊
-
-📝 **Let's gather your financial info**:
-- Monthly income (already have: ₹{:,})
-- Fixed expenses (rent, utilities, EMIs)
-- Variable expenses (food, transport, entertainment)
-- Savings goals
-
-You can either:
-1. Tell me your numbers in this chat
-2. Use the "Budget Analyzer" form in the sidebar
-
-Once I have your data, I'll create:
-- 📊 Visual budget breakdown (pie charts, bar graphs)
-- 📈 Spending analysis with recommendations
-- 💡 Personalized tips to optimize your finances
-- 🎯 Goal-based savings plan
-
-Try the budget form now and I'll give you instant insights!"""
-        
-        # Emergency fund queries
-        elif any(word in user_input_lower for word in ['emergency', 'fund', 'crisis']):
-            months_expense = income * 0.7  # Assuming 70% of income goes to expenses
-            emergency_target = months_expense * 6
-            
-            if demographic == 'student':
-                return f"""Emergency funds are super important, even for students! 🚨
-
-🎯 **Your target**: ₹{emergency_target:,.0f} (6 months of expenses)
-💰 **Monthly saving needed**: ₹{emergency_target/12:,.0f} to build it in 1 year
-
-📍 **Where to keep it**:
-- High-yield savings account (4-6% interest)
-- Liquid funds (slightly better returns)
-- Fixed deposits (if you won't need it soon)
-
-🚀 **Quick start**: Begin with ₹1000/month and increase gradually!"""
-            else:
-                return f"""Emergency fund is crucial for financial stability! 🛡️
-
-🎯 **Your target**: ₹{emergency_target:,.0f} (6 months of expenses)
-💰 **Monthly allocation**: ₹{emergency_target/12:,.0f} to build in 1 year
-
-📍 **Best places to keep emergency funds**:
-- High-yield savings accounts (SBI, HDFC, ICICI)
-- Liquid mutual funds (instant redemption)
-- Ultra-short duration funds
-- Sweep-in fixed deposits
-
-⚡ **Pro tip**: Keep 3 months in savings account, 3 months in liquid funds for better returns!"""
-        
-        # Tax queries
-        elif any(word in user_input_lower for word in ['tax', 'saving', '80c', 'deduction']):
-            if demographic == 'professional':
-                return f"""Tax optimization is key for professionals! 💼
-
-🏛️ **Section 80C (₹1.5L limit)**:
-- PPF: ₹12,500/month (15-year lock, tax-free returns)
-- ELSS: ₹12,500/month (3-year lock, market returns)
-- Life insurance: Term + health insurance premiums
-- Home loan principal repayment
-
-💰 **Additional deductions**:
-- 80D: Health insurance (₹25K-₹50K)
-- 80CCD(1B): NPS (additional ₹50K)
-- 80G: Donations to eligible charities
-
-📊 **Your potential savings** (assuming 30% tax bracket):
-- Section 80C: Save ₹45,000 in taxes
-- Total deductions: Up to ₹2L+ possible
-
-Want me to calculate your exact tax savings?"""
-            else:
-                return """Tax planning for students is simpler but still important! 🎓
-
-📚 **Key points**:
-- Income up to ₹2.5L is tax-free
-- Keep receipts for tuition fees (80C deduction)
-- Health insurance premiums count (80D)
-
-💡 **Future planning**:
-- Start learning about tax-saving investments
-- Consider opening PPF account early
-- Understand basics of income tax
-
-You're in a great position to learn and plan ahead! 🚀"""
-        
-        # General greeting or unclear query
-        else:
-            greeting = "Hello! I'm your personal finance assistant. 👋"
-            
-            if demographic == 'student':
-                greeting += f"""
-
-As a student with ₹{income:,} monthly income, I can help you with:
-- 💰 Smart saving strategies for students
-- 📱 Saving for gadgets (laptops, phones)
-- 📊 Simple budgeting techniques
-- 🎯 Building good financial habits early
-
-**Quick tips for you**:
-- Start saving even ₹500/month - it builds discipline!
-- Use student discounts everywhere
-- Learn about SIPs and compound interest
-- Build an emergency fund gradually"""
-            else:
-                greeting += f"""
-
-As a professional with ₹{income:,} monthly income, I can help you with:
-- 📈 Investment portfolio optimization
-- 🏛️ Tax-saving strategies
-- 🏠 Home buying and loan planning
-- 💼 Retirement and wealth building
-
-**Key focus areas**:
-- Maximize your 80C deductions (₹1.5L)
-- Build diversified investment portfolio
-- Plan for major life goals
-- Optimize your tax efficiency"""
-            
-            greeting += """
-
-**What would you like to explore?**
-- "How do I save for [specific goal]?"
-- "What investments should I consider?"
-- "Help me create a budget"
-- "How can I save on taxes?"
-
-Feel free to use the sidebar to set up your profile and analyze your budget! 📊"""
-            
-            return greeting
+        intent = classify_intent(user_input)
+        if intent == 'general':
+            # Questions outside the known intents get the closest curated FAQ answer
+            answer = answer_from_faq(user_input)
+            if answer:
+                return answer
+        return render_answer(
+            intent,
+            user_profile.get('demographic', 'general'),
+            income=user_profile.get('income', 0),
+            age=user_profile.get('age', 25)
+        )
 
 def collect_user_profile():
     """Collect user profile information"""
@@ -548,15 +340,7 @@ def budget_analyzer():
                 'Others': others
             }
             
-            total_expenses = sum(expenses.values())
-            savings = income - total_expenses
-            
-            st.session_state.budget_data = {
-                'income': income,
-                'expenses': expenses,
-                'total_expenses': total_expenses,
-                'savings': savings
-            }
+            st.session_state.budget_data = finance_engine.analyze_budget(income, expenses)
             
             st.success("Budget analyzed! Check the main area for insights.")
 
@@ -579,15 +363,11 @@ def display_budget_analysis():
         st.metric("Total Expenses", f"₹{data['total_expenses']:,}")
     
     with col3:
-        savings_rate = (data['savings'] / data['income'] * 100) if data['income'] > 0 else 0
-        color = "normal"
-        if data['savings'] < 0:
-            color = "inverse"
-        st.metric("Savings", f"₹{data['savings']:,}", f"{savings_rate:.1f}%", delta_color=color)
+        color = "inverse" if data['is_overspending'] else "normal"
+        st.metric("Savings", f"₹{data['savings']:,}", f"{data['savings_rate']:.1f}%", delta_color=color)
     
     with col4:
-        expense_ratio = (data['total_expenses'] / data['income'] * 100) if data['income'] > 0 else 0
-        st.metric("Expense Ratio", f"{expense_ratio:.1f}%")
+        st.metric("Expense Ratio", f"{data['expense_ratio']:.1f}%")
     
     # Charts
     col1, col2 = st.columns(2)
@@ -653,21 +433,28 @@ def display_budget_analysis():
     # Generate insights
     generate_budget_insights(data)
 
+# Tip shown under a category that is over its guideline, keyed by guideline
+CATEGORY_TIPS = {
+    'housing': "💡 **Consider**: roommates, cheaper area, or house-sharing",
+    'food': "💡 **Try**: meal planning, cooking at home, bulk buying",
+    'entertainment': "💡 **Look for**: free events, streaming instead of movies, group activities",
+    'shopping': "💡 **Practice**: 24-hour rule, compare prices, buy only necessities"
+}
+
 def generate_budget_insights(data):
     """Generate spending insights and recommendations"""
     st.header("💡 Spending Insights & Recommendations")
     
-    income = data['income']
-    expenses = data['expenses']
     savings = data['savings']
-    savings_rate = (savings / income * 100) if income > 0 else 0
+    savings_rate = data['savings_rate']
+    status = data['savings_status']
     
     # Savings rate analysis
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("💰 Savings Analysis")
-        if savings_rate < 0:
+        if status == 'overspending':
             st.markdown("""
             <div class="error-card">
                 <h4>⚠️ Critical: You're Overspending!</h4>
@@ -680,7 +467,7 @@ def generate_budget_insights(data):
                 </ul>
             </div>
             """.format(abs(savings)), unsafe_allow_html=True)
-        elif savings_rate < 10:
+        elif status == 'poor':
             st.markdown("""
             <div class="warning-card">
                 <h4>⚠️ Low Savings Rate</h4>
@@ -693,7 +480,7 @@ def generate_budget_insights(data):
                 </ul>
             </div>
             """.format(savings_rate), unsafe_allow_html=True)
-        elif savings_rate < 20:
+        elif status == 'acceptable':
             st.markdown("""
             <div class="insight-card">
                 <h4>📈 Good Progress!</h4>
@@ -725,40 +512,21 @@ def generate_budget_insights(data):
         
         # Category-wise analysis
         issues_found = False
-        for category, amount in expenses.items():
-            percentage = (amount / income * 100) if income > 0 else 0
-            
-            # Define thresholds
-            thresholds = {
-                'Rent/Housing': 30,
-                'Food & Groceries': 15,
-                'Transport': 15,
-                'Entertainment': 10,
-                'Shopping': 15,
-                'Utilities': 10,
-                'Others': 10
-            }
-            
-            threshold = thresholds.get(category, 10)
+        for check in data['categories']:
+            category, percentage, threshold = check['category'], check['ratio'], check['limit']
             
-            if percentage > threshold:
+            if check['over_limit']:
                 issues_found = True
                 st.markdown(f"""
                 <div class="warning-card">
                     <h5>🚨 {category}: {percentage:.1f}%</h5>
-                    <p>Recommended: <{threshold}% | Overspend: {percentage-threshold:.1f}%</p>
+                    <p>Recommended: <{threshold}% | Overspend: {check['excess']:.1f}%</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
                 # Specific recommendations
-                if 'Housing' in category:
-                    st.markdown("💡 **Consider**: roommates, cheaper area, or house-sharing")
-                elif 'Food' in category:
-                    st.markdown("💡 **Try**: meal planning, cooking at home, bulk buying")
-                elif 'Entertainment' in category:
-                    st.markdown("💡 **Look for**: free events, streaming instead of movies, group activities")
-                elif 'Shopping' in category:
-                    st.markdown("💡 **Practice**: 24-hour rule, compare prices, buy only necessities")
+                if check['guideline'] in CATEGORY_TIPS:
+                    st.markdown(CATEGORY_TIPS[check['guideline']])
             else:
                 st.markdown(f"""
                 <div class="insight-card">
@@ -852,7 +620,7 @@ def main():
             with st.spinner("Thinking..."):
                 context = ""
                 if st.session_state.budget_data:
-                    context = f"User's budget data: Income ₹{st.session_state.budget_data['income']:,}, Expenses ₹{st.session_state.budget_data['total_expenses']:,}, Savings ₹{st.session_state.budget_data['savings']:,}"
+                    context = finance_engine.budget_context(st.session_state.budget_data)
                 
                 response = assistant.generate_response(
                     prompt, 
@@ -0,0 +1,95 @@
+"""
+Lazy loading of heavy model backends for the Financial Assistant
+"""
+
+import importlib
+import importlib.util
+import threading
+
+
+class BackendRegistry:
+    """Registry that imports heavy backend modules only when they are selected"""
+
+    def __init__(self):
+        self._modules = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    def register(self, name, module_name):
+        """Register a backend by the module that provides it"""
+        self._modules[name] = module_name
+
+    def is_available(self, name):
+        """Check whether a backend is installed without importing it"""
+        module_name = self._modules.get(name)
+        if module_name is None:
+            return False
+        try:
+            return importlib.util.find_spec(module_name) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def is_loaded(self, name):
+        """Check whether a backend has already been imported"""
+        return name in self._loaded
+
+    def load(self, name):
+        """Import a backend on first use and return its module"""
+        module = self._loaded.get(name)
+        if module is not None:
+            return module
+
+        if name not in self._modules:
+            raise KeyError(f"Unknown backend: {name}")
+
+        with self._lock:
+            if name not in self._loaded:
+                self._loaded[name] = importlib.import_module(self._modules[name])
+            return self._loaded[name]
+
+    def warm_up(self, names, background=True):
+        """Import the given backends ahead of first use, optionally in a daemon thread"""
+        names = [name for name in names if self.is_available(name) and not self.is_loaded(name)]
+        if not names:
+            return None
+
+        def _load_all():
+            for name in names:
+                try:
+                    self.load(name)
+                except Exception:
+                    # A failed warm-up is retried (and reported) on first real use
+                    continue
+
+        if not background:
+            _load_all()
+            return None
+
+        with self._lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return self._warmup_thread
+            self._warmup_thread = threading.Thread(target=_load_all, name="backend-warmup", daemon=True)
+            self._warmup_thread.start()
+            return self._warmup_thread
+
+
+registry = BackendRegistry()
+registry.register("gemini", "google.generativeai")
+registry.register("transformers", "transformers")
+registry.register("torch", "torch")
+
+
+def is_available(name):
+    """Check whether a backend is installed without importing it"""
+    return registry.is_available(name)
+
+
+def load(name):
+    """Import a backend on first use and return its module"""
+    return registry.load(name)
+
+
+def warm_up(names, background=True):
+    """Import the given backends ahead of first use"""
+    return registry.warm_up(names, background=background)
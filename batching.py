@@ -0,0 +1,130 @@
+"""
+Micro-batching worker for local text generation shared by all Streamlit sessions
+"""
+
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+
+from config import MODEL_CONFIG
+from local_model import get_local_generator
+
+
+class _Request:
+    """One prompt waiting for generation together with the future its caller holds"""
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+
+
+class MicroBatcher:
+    """Collects concurrent prompts into batches for a single generation worker.
+
+    The worker blocks for the first request, then keeps collecting until
+    `max_batch_size` prompts are queued or `max_wait_ms` has passed since the
+    first one arrived, and generates the whole batch in one padded call. Each
+    caller gets its own reply through a Future.
+    """
+
+    def __init__(self, generate_batch, max_batch_size=8, max_wait_ms=20, latency_window=1000):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = defaultdict(lambda: {'batches': 0, 'requests': 0, 'seconds': 0.0})
+        self._latencies = defaultdict(lambda: deque(maxlen=latency_window))
+        self._thread = threading.Thread(target=self._worker, name="local-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt):
+        """Queue a prompt and return a Future that resolves to its reply"""
+        request = _Request(prompt)
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt, timeout=None):
+        """Queue a prompt and wait for its reply, dropping it from the queue on timeout"""
+        future = self.submit(prompt)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stats(self):
+        """Return throughput and latency per batch size, for tuning batch size and wait"""
+        stats = {}
+        with self._lock:
+            for size, totals in sorted(self._batches.items()):
+                latencies = sorted(self._latencies[size])
+                stats[size] = {
+                    'batches': totals['batches'],
+                    'requests': totals['requests'],
+                    'requests_per_second': totals['requests'] / totals['seconds'] if totals['seconds'] else 0.0,
+                    'p50_latency': latencies[len(latencies) // 2] if latencies else 0.0,
+                    'p95_latency': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+                }
+        return {'queued': self._queue.qsize(), 'by_batch_size': stats}
+
+    def _collect(self):
+        """Block for one request, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            # Callers that gave up on their future do not need a reply
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.monotonic()
+            try:
+                replies = self.generate_batch([request.prompt for request in batch])
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            finished = time.monotonic()
+            for request, reply in zip(batch, replies):
+                request.future.set_result(reply)
+            with self._lock:
+                totals = self._batches[len(batch)]
+                totals['batches'] += 1
+                totals['requests'] += len(batch)
+                totals['seconds'] += finished - start
+                self._latencies[len(batch)].extend(finished - request.submitted_at for request in batch)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_inference_batcher():
+    """Return the process-wide batcher around the local model, loading it on first use"""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    get_local_generator().generate_batch,
+                    max_batch_size=MODEL_CONFIG['local_batch_size'],
+                    max_wait_ms=MODEL_CONFIG['local_batch_wait_ms']
+                )
+    return _batcher
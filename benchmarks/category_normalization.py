@@ -0,0 +1,71 @@
+"""
+Category normalization: per-row keyword chain vs the precomputed lookup table
+
+Maps a synthetic Category column to FINANCIAL_GUIDELINES keys with the old
+per-label `.lower().replace(...)` and `in` chain applied row by row, and
+with categories.normalize_categories (one lookup per distinct label, then a
+take over the codes), for plain string and categorical columns. Run from the
+repository root:
+
+    python -m benchmarks.category_normalization [--rows 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.statements import CATEGORIES
+from categories import normalize_categories
+
+# Labels the apps and sample data use, plus a few export-style variants
+LABELS = list(CATEGORIES) + ["Food & Dining", "Rent/Housing", "Transport", "Utilities", "Others",
+                             "  food & groceries", "TRANSPORTATION"]
+
+
+def old_guideline_key(category):
+    """BudgetAnalyzer.guideline_key before the lookup table"""
+    category_key = category.lower().replace('/', '_').replace(' & ', '_').replace(' ', '_')
+    if 'rent' in category_key or 'housing' in category_key:
+        return 'housing'
+    elif 'food' in category_key or 'groceries' in category_key:
+        return 'food'
+    elif 'transport' in category_key:
+        return 'transport'
+    elif 'entertainment' in category_key:
+        return 'entertainment'
+    elif 'utilities' in category_key:
+        return 'utilities'
+    elif 'shopping' in category_key:
+        return 'shopping'
+    return 'others'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    column = pd.Series(np.array(LABELS, dtype=object)[rng.integers(0, len(LABELS), args.rows)])
+    columns = {"string": column, "categorical": column.astype("category")}
+    print(f"{args.rows:,} rows, {len(LABELS)} distinct labels")
+    print(f"{'column':<13}{'method':<15}{'seconds':>9}{'rows/s':>15}")
+    for kind, values in columns.items():
+        methods = {
+            "per-row chain": lambda: values.astype(object).map(old_guideline_key),
+            "lookup table": lambda: normalize_categories(values)
+        }
+        results = {}
+        for name, method in methods.items():
+            start = time.perf_counter()
+            results[name] = pd.Series(method()).astype(object)
+            seconds = time.perf_counter() - start
+            print(f"{kind:<13}{name:<15}{seconds:>9.3f}{args.rows / seconds:>15,.0f}")
+        agree = (results["per-row chain"] == results["lookup table"]).mean()
+        print(f"{'':<13}labels agreeing: {agree:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+CSV parser backends: pandas C engine vs pyarrow vs the python csv module
+
+Streams synthetic statements of each size through
+finance_engine.stream_transactions with every available parser, each run in
+a fresh interpreter, and reports rows/sec and peak RSS, plus which parser
+the automatic choice picks for that file size. Run from the repository root:
+
+    python -m benchmarks.csv_parsers [--rows 10000 1000000 10000000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.csv_streaming import peak_rss_mb
+from finance_engine import stream_transactions
+from finance_engine.parsers import available_parsers, choose_parser
+
+
+def run_parser(parser, path):
+    """Stream the file in this process with one parser and return timings"""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    totals, _ = stream_transactions(path, "Amount", "Category", "Date", keep_rows=0, parser=parser)
+    return {
+        "seconds": time.perf_counter() - start,
+        "baseline_mb": baseline,
+        "peak_mb": peak_rss_mb(),
+        "total": totals.total,
+        "parser": totals.parser
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--parsers", nargs="+", default=available_parsers())
+    parser.add_argument("--parser", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.parser:
+        print(json.dumps(run_parser(args.parser, args.path)))
+        return
+
+    print(f"{'rows':>12}{'MB':>7}  {'parser':<10}{'seconds':>9}{'rows/s':>14}{'peak RSS (MB)':>15}{'after imports (MB)':>20}")
+    for rows in args.rows:
+        # Children inherit the parent's peak RSS on Linux, so even the test file is written by a child
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            subprocess.run([sys.executable, "-m", "benchmarks.statements", path, "--rows", str(rows)],
+                           capture_output=True, check=True)
+            size = os.path.getsize(path)
+            totals = set()
+            for name in args.parsers:
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.csv_parsers", "--parser", name, "--path", path],
+                    capture_output=True, text=True, check=True
+                )
+                result = json.loads(output.stdout.strip().splitlines()[-1])
+                totals.add(round(result['total'], 2))
+                print(f"{rows:>12,}{size / 1e6:>7.0f}  {result['parser']:<10}{result['seconds']:>9.2f}"
+                      f"{rows / result['seconds']:>14,.0f}{result['peak_mb']:>15.0f}{result['baseline_mb']:>20.0f}")
+            print(f"{'':>21}auto: {choose_parser(size)}; "
+                  + ("totals match" if len(totals) == 1 else f"totals differ: {sorted(totals)}"))
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
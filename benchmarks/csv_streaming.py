@@ -0,0 +1,90 @@
+"""
+CSV upload ingestion: whole-file read vs chunked streaming
+
+Analyzes a synthetic statement the way csv_expense_uploader used to (one
+read_csv, a cleaned copy and to_dict('records')) and with
+finance_engine.stream_transactions, each in a fresh interpreter, and
+reports time and peak RSS. Run from the repository root:
+
+    python -m benchmarks.csv_streaming [--rows 2000000] [--chunk-size 100000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from finance_engine import clean_transactions, stream_transactions, summarize_transactions
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_mode(mode, path, chunk_size):
+    """Analyze the file in this process and return timings"""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "whole-file":
+        df = pd.read_csv(path)
+        cleaned, _ = clean_transactions(df, "Amount", "Category", "Date")
+        summary = summarize_transactions(cleaned)
+        cleaned.to_dict('records')
+    else:
+        totals, _ = stream_transactions(path, "Amount", "Category", "Date", chunk_size=chunk_size, keep_rows=0)
+        summary = totals.summary()
+    return {
+        "seconds": time.perf_counter() - start,
+        "baseline_mb": baseline,
+        "peak_mb": peak_rss_mb(),
+        "total": summary['total']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.path, args.chunk_size)))
+        return
+
+    # Children inherit the parent's peak RSS on Linux, so even the test file is written by a child
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        subprocess.run([sys.executable, "-m", "benchmarks.statements", path, "--rows", str(args.rows)],
+                       capture_output=True, check=True)
+        print(f"{args.rows:,} rows, {os.path.getsize(path) / 1e6:.0f} MB, chunk size {args.chunk_size:,}")
+        print(f"{'mode':<12}{'seconds':>10}{'rows/s':>14}{'peak RSS (MB)':>15}{'after imports (MB)':>20}")
+        totals = set()
+        for mode in ("whole-file", "streaming"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.csv_streaming", "--mode", mode, "--path", path,
+                 "--chunk-size", str(args.chunk_size)],
+                capture_output=True, text=True, check=True
+            )
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            totals.add(round(result['total'], 2))
+            print(f"{mode:<12}{result['seconds']:>10.2f}{args.rows / result['seconds']:>14,.0f}{result['peak_mb']:>15.0f}"
+                  f"{result['baseline_mb']:>20.0f}")
+        print("totals match" if len(totals) == 1 else f"totals differ: {sorted(totals)}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
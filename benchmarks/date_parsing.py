@@ -0,0 +1,68 @@
+"""
+Statement date parsing: pd.to_datetime inference vs finance_engine.DateParser
+
+Parses a million-row synthetic Date column in three shapes (ISO dates,
+day-first bank dates, and a mix of three formats) with the old
+`pd.to_datetime(errors='coerce')` call, with format='mixed' and with the
+sniffing, per-format, unique-string DateParser. Reports rows/sec and the
+share of rows parsed to the right date. Run from the repository root:
+
+    python -m benchmarks.date_parsing [--rows 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from finance_engine import DateParser
+
+MIXED_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d %b %Y"]
+
+
+def make_columns(rows, seed=0):
+    """Return the true dates and {shape: string column} for `rows` transactions"""
+    rng = np.random.default_rng(seed)
+    truth = pd.Series(pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 5 * 365, rows), unit="D"))
+    mixed = truth.dt.strftime(MIXED_FORMATS[0])
+    for code, date_format in enumerate(MIXED_FORMATS[1:], 1):
+        # Formats come in runs, like statements from different accounts appended together
+        block = (np.arange(rows) // 10_000) % len(MIXED_FORMATS) == code
+        mixed[block] = truth[block].dt.strftime(date_format)
+    return truth, {
+        "ISO": truth.dt.strftime("%Y-%m-%d"),
+        "day-first": truth.dt.strftime("%d/%m/%Y"),
+        "mixed": mixed
+    }
+
+
+PARSERS = {
+    "to_datetime": lambda column: pd.to_datetime(column, errors='coerce'),
+    "format=mixed": lambda column: pd.to_datetime(column, errors='coerce', format='mixed', dayfirst=True),
+    "DateParser": lambda column: DateParser().parse(column)
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-mixed", action="store_true", help="skip the slow format='mixed' runs")
+    args = parser.parse_args()
+
+    truth, columns = make_columns(args.rows)
+    print(f"{args.rows:,} rows")
+    print(f"{'column':<11}{'parser':<14}{'seconds':>9}{'rows/s':>14}{'correct':>10}")
+    for shape, column in columns.items():
+        for name, parse in PARSERS.items():
+            if args.skip_mixed and name == "format=mixed":
+                continue
+            start = time.perf_counter()
+            parsed = parse(column)
+            seconds = time.perf_counter() - start
+            correct = (pd.Series(parsed).to_numpy() == truth.to_numpy()).mean()
+            print(f"{shape:<11}{name:<14}{seconds:>9.2f}{args.rows / seconds:>14,.0f}{correct:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Local fake of the Gemini REST endpoint for offline timing runs
+
+Point the app at it by setting MODEL_CONFIG["gemini_api_endpoint"] to the
+printed URL. Each model can be given its own latency (or made to hang),
+and only keys listed in --valid-key are accepted.
+
+    python -m benchmarks.fake_gemini --port 8765 --latency gemini-1.5-flash=0.4
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PATH = re.compile(r"^/v1beta/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)")
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    """HTTP server answering generateContent/streamGenerateContent like Gemini"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, valid_keys=("test-key",), latencies=None,
+                 reply="Hello! This is a fake Gemini reply.", chunk_delay=0.05):
+        super().__init__(("127.0.0.1", port), _FakeGeminiHandler)
+        self.valid_keys = set(valid_keys)
+        self.latencies = dict(latencies or {})
+        self.reply = reply
+        self.chunk_delay = chunk_delay
+        self.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        """Serve in a daemon thread and return the server"""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _FakeGeminiHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        server.request_count += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        match = _PATH.match(self.path)
+        if match is None:
+            return self._send_error(404, "NOT_FOUND", f"Unknown path {self.path}")
+        model = match.group("model")
+        if model not in server.latencies:
+            return self._send_error(404, "NOT_FOUND", f"models/{model} is not found")
+        if self.headers.get("x-goog-api-key") not in server.valid_keys:
+            return self._send_error(400, "INVALID_ARGUMENT", "API key not valid. Please pass a valid API key.")
+
+        # A negative latency makes the model hang until the client gives up
+        latency = server.latencies[model]
+        time.sleep(latency if latency >= 0 else 3600)
+
+        if match.group("method") == "generateContent":
+            return self._send_json(200, _response(server.reply))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        words = server.reply.split(" ")
+        self.wfile.write(b"[")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            if i:
+                self.wfile.write(b",")
+            self.wfile.write(json.dumps(_response(text)).encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(server.chunk_delay)
+        self.wfile.write(b"]")
+
+    def _send_error(self, code, status, message):
+        self._send_json(code, {"error": {"code": code, "message": message, "status": status}})
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _response(text):
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0,
+        }]
+    }
+
+
+def _parse_latency(value):
+    model, _, seconds = value.partition("=")
+    return model, float(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--valid-key", action="append", default=None)
+    parser.add_argument("--latency", action="append", type=_parse_latency, default=None,
+                        help="MODEL=SECONDS, negative to hang (repeatable)")
+    args = parser.parse_args()
+
+    latencies = dict(args.latency or [("gemini-1.5-flash", 0.3), ("gemini-1.0-pro", 0.6), ("gemini-pro", 0.6)])
+    server = FakeGeminiServer(args.port, valid_keys=args.valid_key or ["test-key"], latencies=latencies)
+    print(f"Fake Gemini endpoint listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Offline FAQ retrieval: index build and load time, lookup latency and accuracy
+
+Builds the hashed n-gram TF-IDF index into a temporary directory, reopens it
+memory-mapped, then times searches over paraphrased questions and checks that
+the expected FAQ entry ranks first. Run from the repository root:
+
+    python -m benchmarks.faq_retrieval [--repeat 200]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+from config import RETRIEVAL_CONFIG
+from retrieval import FAQIndex, build_index
+
+# (paraphrased question, expected FAQ id)
+QUERIES = [
+    ("how to improve my cibil score", "credit-score"),
+    ("credit card bill is too high, help", "credit-card-debt"),
+    ("should I buy a house or keep renting", "rent-vs-buy"),
+    ("difference between old and new regime", "tax-regime"),
+    ("is bitcoin safe to buy", "crypto"),
+    ("how much life cover do I need", "term-insurance"),
+    ("medical insurance for my mom and dad", "parents-insurance"),
+    ("tips for managing my first salary", "first-salary"),
+    ("how do I plan for my kid's college fees", "child-education"),
+    ("how to stop shopping online so much", "spending-control"),
+    ("I got a bonus this year, what now", "salary-hike"),
+    ("national pension scheme worth it?", "nps"),
+    ("what is ppf", "ppf"),
+    ("avalanche or snowball for paying loans", "debt-strategy"),
+    ("prepay home loan or put money in mutual funds", "home-loan-prepay"),
+    ("is an LIC endowment policy good", "endowment-vs-term"),
+    ("how to claim house rent allowance", "hra"),
+    ("FD or debt fund which is better", "fd-vs-debt-fund"),
+    ("what is a nifty index fund", "index-funds"),
+    ("someone asked for my OTP on a call", "fraud-safety"),
+    ("how big a corpus to retire at 50", "retirement-corpus"),
+    ("I'm a freelancer with irregular income", "side-income"),
+    ("should I buy gold ETF", "gold"),
+    ("budget for my wedding next year", "wedding-planning"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        build_index(RETRIEVAL_CONFIG['faq_path'], index_dir, RETRIEVAL_CONFIG['dimensions'])
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        index, _ = FAQIndex.load(index_dir)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for _ in range(args.repeat):
+            for query, _ in QUERIES:
+                start = time.perf_counter()
+                index.search(query, top_k=RETRIEVAL_CONFIG['top_k'])
+                timings.append((time.perf_counter() - start) * 1000)
+
+        correct = 0
+        misses = []
+        for query, expected in QUERIES:
+            hits = index.search(query, top_k=1, min_score=RETRIEVAL_CONFIG['min_score'])
+            if hits and hits[0][1]['id'] == expected:
+                correct += 1
+            else:
+                misses.append((query, expected, hits[0][1]['id'] if hits else "(below threshold)"))
+
+        timings.sort()
+        print(f"{len(index.entries)} FAQ entries, {index.dimensions} hashed dimensions")
+        print(f"build: {build_ms:.1f} ms   load (memory-mapped): {load_ms:.2f} ms")
+        print(f"search: p50 {statistics.median(timings):.3f} ms   "
+              f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms")
+        print(f"top-1 accuracy: {correct}/{len(QUERIES)} above min_score {RETRIEVAL_CONFIG['min_score']}")
+        for query, expected, got in misses:
+            print(f"  miss: {query!r} expected {expected}, got {got}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Upload memory per row: all columns with default dtypes vs usecols and compact dtypes
+
+Reads a synthetic statement the old way (every column, then a float64 /
+object-string cleaned copy) and the new way (only the mapped columns,
+float32 amounts, categorical Category), and reports bytes per row of the
+parsed and the cleaned frames. Run from the repository root:
+
+    python -m benchmarks.ingest_dtypes [--rows 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.statements import write_statement
+from finance_engine import clean_transactions
+from finance_engine.transactions import bytes_per_row
+
+MAPPING = ("Amount", "Category", "Date")
+
+
+def old_ingest(path):
+    """The uploader's read and clean before usecols and compact dtypes"""
+    df = pd.read_csv(path)
+    cleaned = df[list(MAPPING)].copy()
+    cleaned['Amount'] = pd.to_numeric(cleaned['Amount'], errors='coerce')
+    cleaned['Date'] = pd.to_datetime(cleaned['Date'], errors='coerce')
+    return df, cleaned.dropna(subset=['Amount'])
+
+
+def new_ingest(path):
+    df = pd.read_csv(path, usecols=list(MAPPING))
+    return df, clean_transactions(df, *MAPPING)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        write_statement(path, args.rows)
+        print(f"{args.rows:,} rows, {os.path.getsize(path) / 1e6:.0f} MB")
+        print(f"{'ingest':<10}{'seconds':>9}{'parsed B/row':>14}{'cleaned B/row':>15}{'both held (MB)':>16}")
+        for name, ingest in (("old", old_ingest), ("new", new_ingest)):
+            start = time.perf_counter()
+            parsed, cleaned = ingest(path)
+            seconds = time.perf_counter() - start
+            held = (bytes_per_row(parsed) * len(parsed) + bytes_per_row(cleaned) * len(cleaned)) / 1e6
+            print(f"{name:<10}{seconds:>9.2f}{bytes_per_row(parsed):>14.1f}{bytes_per_row(cleaned):>15.1f}{held:>16.0f}")
+        print("\nnew cleaned dtypes:", {column: str(dtype) for column, dtype in cleaned.dtypes.items()})
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
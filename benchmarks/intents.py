@@ -0,0 +1,89 @@
+"""
+Intent classification: chained keyword scans vs the compiled classifier
+
+Times the previous `any(word in text for word in [...])` chain from
+app_simple.py against intents.IntentClassifier over a corpus of chat
+queries, and lists the queries where the two disagree. Run from the
+repository root:
+
+    python -m benchmarks.intents [--repeat 2000]
+"""
+
+import argparse
+import time
+
+from intents import classifier
+
+QUERIES = [
+    "How do I save money for a new laptop?",
+    "what is the best way to start saving as a student",
+    "Should I invest in mutual funds or fixed deposits?",
+    "How much SIP should I start with 50000 salary?",
+    "Can you review my portfolio allocation?",
+    "Help me make a monthly budget",
+    "My expenses are too high, what can I cut?",
+    "I keep overspending on food delivery",
+    "How big should my emergency fund be?",
+    "I lost my job, how do I handle this financial crisis?",
+    "How can I save tax under 80C?",
+    "Which tax saving investments are best for me?",
+    "What deductions can I claim on my home loan?",
+    "Is ELSS a good tax saving mutual fund?",
+    "I want to buy a phone next year",
+    "Where should I keep my money for short term goals?",
+    "How do I plan for retirement at 30?",
+    "Hi there!",
+    "Is it smart to invest my emergency fund in stocks?",
+    "How do I get a refund for a failed UPI payment?",
+    "Should I take a taxi or buy a bike to save on commute?",
+    "Which index fund has the lowest expense ratio?",
+    "What is a good savings rate for a professional?",
+    "gossip about the stock market crash",
+    "How do I track my spending every month?",
+]
+
+
+def legacy_intent(text):
+    """The chained substring scans the apps used before the shared classifier"""
+    text = text.lower()
+    if any(word in text for word in ['save', 'saving', 'savings', 'laptop', 'phone']):
+        return 'savings'
+    elif any(word in text for word in ['invest', 'investment', 'sip', 'mutual fund', 'portfolio']):
+        return 'investment'
+    elif any(word in text for word in ['budget', 'expense', 'spending', 'money']):
+        return 'budget'
+    elif any(word in text for word in ['emergency', 'fund', 'crisis']):
+        return 'emergency'
+    elif any(word in text for word in ['tax', 'saving', '80c', 'deduction']):
+        return 'tax'
+    return 'general'
+
+
+def per_query_us(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            func(query)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy = per_query_us(legacy_intent, args.repeat)
+    compiled = per_query_us(classifier.classify, args.repeat)
+    print(f"{len(QUERIES)} queries x {args.repeat}")
+    print(f"{'chained scans':<16}{legacy:>8.2f} us/query")
+    print(f"{'compiled regex':<16}{compiled:>8.2f} us/query  (speed-up {legacy / compiled:.1f}x)")
+
+    changed = [(query, legacy_intent(query), classifier.classify(query))
+               for query in QUERIES if legacy_intent(query) != classifier.classify(query)]
+    print(f"\n{len(changed)} of {len(QUERIES)} queries classified differently:")
+    for query, old, new in changed:
+        print(f"  {old:>10} -> {new:<10} {query}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+API key validation timing against the local fake Gemini endpoint
+
+Compares the old one-model-at-a-time probe with the concurrent,
+deadline-bounded validator, plus a cached revalidation. Runs offline:
+
+    python -m benchmarks.key_validation
+"""
+
+import time
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from config import MODEL_CONFIG
+import gemini_client
+
+SCENARIOS = [
+    # (name, api key, per-model latencies in seconds; negative hangs)
+    ("valid key, first model slow", "test-key",
+     {"gemini-1.5-flash": 1.5, "gemini-1.0-pro": 0.3, "gemini-pro": 0.8}),
+    ("valid key, first model hangs", "test-key",
+     {"gemini-1.5-flash": -1, "gemini-1.0-pro": 0.4, "gemini-pro": 0.4}),
+    ("invalid key", "wrong-key",
+     {"gemini-1.5-flash": 0.2, "gemini-1.0-pro": 0.2, "gemini-pro": 0.2}),
+    ("all models hang", "test-key",
+     {"gemini-1.5-flash": -1, "gemini-1.0-pro": -1, "gemini-pro": -1}),
+]
+
+
+def sequential_validate(api_key, model_names):
+    """The previous behaviour: probe each model in turn with no deadline"""
+    for model_name, model in gemini_client.create_models(api_key, model_names):
+        try:
+            response = model.generate_content("Hello", request_options={'retry': None})
+            if response and response.text:
+                return True, model_name
+        except Exception:
+            continue
+    return False, None
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    model_names = MODEL_CONFIG['gemini_models']
+    timeout = MODEL_CONFIG['key_probe_timeout']
+    print(f"{'scenario':<32}{'sequential (s)':>16}{'parallel (s)':>14}{'cached (s)':>12}  verdict")
+
+    for name, api_key, latencies in SCENARIOS:
+        server = FakeGeminiServer(latencies=latencies).start()
+        MODEL_CONFIG['gemini_api_endpoint'] = server.url
+        try:
+            if any(latency < 0 for latency in latencies.values()):
+                sequential = "  hangs"
+            else:
+                sequential = f"{timed(sequential_validate, api_key, model_names)[0]:.3f}"
+
+            validator = gemini_client.ApiKeyValidator(model_names, probe_timeout=timeout)
+            parallel, verdict = timed(validator.validate, api_key)
+            cached, _ = timed(validator.validate, api_key)
+            cached = f"{cached:.4f}" if validator.cached_verdict(api_key) else "not cached"
+            print(f"{name:<32}{sequential:>16}{parallel:>14.3f}{cached:>12}  {verdict[1]}")
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-batching throughput and latency for the local model
+
+Fires a fixed number of concurrent chat prompts at the batcher for each
+maximum batch size and reports requests/s, tokens/s and p50/p95 latency, so
+`local_batch_size` and `local_batch_wait_ms` can be tuned for the machine's
+core count. Run from the repository root:
+
+    python -m benchmarks.local_batching [--model microsoft/DialoGPT-medium] [--sizes 1 2 4 8]
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import MicroBatcher
+from config import MODEL_CONFIG
+from local_model import LocalGenerator
+
+PROMPTS = [
+    "How much should I keep in an emergency fund?",
+    "Is it better to repay my car loan early or invest in a SIP?",
+    "What is a good savings rate on a 40000 rupee monthly salary?",
+    "Should I buy term insurance before I turn 30?",
+    "How do I start budgeting as a student?",
+    "What are safe investments for a retired couple?",
+    "How can I reduce my credit card debt faster?",
+    "Is PPF or ELSS better for tax saving?",
+]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(generator, max_batch_size, wait_ms, requests, max_new_tokens):
+    """Submit `requests` prompts at once and time every reply"""
+    batcher = MicroBatcher(
+        lambda prompts: generator.generate_batch(prompts, max_new_tokens),
+        max_batch_size=max_batch_size,
+        max_wait_ms=wait_ms
+    )
+
+    def ask(index):
+        start = time.perf_counter()
+        batcher.generate(PROMPTS[index % len(PROMPTS)])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=requests) as pool:
+        latencies = list(pool.map(ask, range(requests)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=MODEL_CONFIG['fallback_model'])
+    parser.add_argument("--threads", type=int, default=MODEL_CONFIG['local_num_threads'])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--wait-ms", type=int, default=MODEL_CONFIG['local_batch_wait_ms'])
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    generator = LocalGenerator(args.model, quantize=not args.no_quantize, num_threads=args.threads,
+                               do_sample=False)
+    generator.generate_batch(PROMPTS[:1], args.max_new_tokens)  # warm-up
+
+    print(f"model: {args.model}  requests: {args.requests}  wait: {args.wait_ms} ms  "
+          f"new tokens: {args.max_new_tokens}")
+    # tokens/s assumes every reply uses its full token budget
+    print(f"{'batch size':>10}{'req/s':>9}{'tokens/s':>10}{'p50 (s)':>9}{'p95 (s)':>9}")
+    for size in args.sizes:
+        throughput, latencies = run(generator, size, args.wait_ms, args.requests, args.max_new_tokens)
+        print(f"{size:>10}{throughput:>9.2f}{throughput * args.max_new_tokens:>10.0f}"
+              f"{percentile(latencies, 0.5):>9.2f}{percentile(latencies, 0.95):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Local model inference: fp32 vs int8 dynamic quantization on CPU
+
+Loads the model twice (full precision and quantized) and reports generation
+throughput, serialized weight size and process peak RSS. Run from the
+repository root:
+
+    python -m benchmarks.local_inference [--model microsoft/DialoGPT-medium] [--threads 4]
+"""
+
+import argparse
+import resource
+import statistics
+import sys
+import time
+
+import backends
+from config import MODEL_CONFIG
+from local_model import LocalGenerator
+
+PROMPT = "How much of my monthly salary should I put into an emergency fund?"
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(generator, runs, max_new_tokens):
+    """Return median tokens/sec and median seconds per reply over `runs` greedy generations"""
+    inputs = generator.tokenizer(PROMPT, return_tensors='pt')
+    kwargs = generator.generation_kwargs(max_new_tokens)
+    kwargs.update(do_sample=False, min_new_tokens=max_new_tokens)
+    kwargs.pop('temperature', None)
+
+    torch = backends.load('torch')
+    with torch.inference_mode():
+        generator.model.generate(**inputs, **kwargs)  # warm-up
+        rates, seconds = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            output = generator.model.generate(**inputs, **kwargs)
+            elapsed = time.perf_counter() - start
+            new_tokens = output.shape[1] - inputs['input_ids'].shape[1]
+            rates.append(new_tokens / elapsed)
+            seconds.append(elapsed)
+    return statistics.median(rates), statistics.median(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=MODEL_CONFIG['fallback_model'])
+    parser.add_argument("--threads", type=int, default=MODEL_CONFIG['local_num_threads'])
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"model: {args.model}  threads: {args.threads or 'default'}  new tokens: {args.max_new_tokens}")
+    print(f"{'variant':<10}{'tokens/s':>10}{'s/reply':>10}{'weights (MB)':>14}{'peak RSS (MB)':>15}")
+    # Peak RSS only grows, so the fp32 model is measured first
+    for quantize in (False, True):
+        generator = LocalGenerator(args.model, quantize=quantize, num_threads=args.threads)
+        rate, seconds = measure(generator, args.runs, args.max_new_tokens)
+        weights = generator.model_bytes() / 1e6
+        variant = "int8" if quantize else "fp32"
+        print(f"{variant:<10}{rate:>10.1f}{seconds:>10.2f}{weights:>14.1f}{peak_rss_mb():>15.0f}")
+        del generator
+
+
+if __name__ == "__main__":
+    main()
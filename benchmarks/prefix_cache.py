@@ -0,0 +1,70 @@
+"""
+Prefill time saved by reusing the advisor prefix's key/value cache
+
+For a set of chat questions, times the prompt forward pass (prefill) over
+the full advisor prompt against a pass over just the per-request suffix on
+top of a copy of the cached prefix. Run from the repository root:
+
+    python -m benchmarks.prefix_cache [--model microsoft/DialoGPT-medium] [--runs 5]
+"""
+
+import argparse
+import statistics
+import time
+
+import backends
+from benchmarks.local_batching import PROMPTS
+from config import MODEL_CONFIG
+from local_model import LocalGenerator
+from prompts import ADVISOR_PREFIX, build_request_suffix
+
+PROFILE = {'demographic': 'professional', 'age': 32, 'income': 85000, 'goals': 'retirement planning'}
+
+
+def median_seconds(func, runs):
+    func()  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=MODEL_CONFIG['fallback_model'])
+    parser.add_argument("--threads", type=int, default=MODEL_CONFIG['local_num_threads'])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    torch = backends.load('torch')
+    generator = LocalGenerator(args.model, quantize=not args.no_quantize, num_threads=args.threads)
+    generator.set_prefix(ADVISOR_PREFIX)
+    prefix_tokens = generator.prefix_ids.shape[1]
+
+    full_times, cached_times, suffix_lengths = [], [], []
+    with torch.inference_mode():
+        for question in PROMPTS:
+            suffix = build_request_suffix(question, PROFILE)
+            full_ids = generator.tokenizer(ADVISOR_PREFIX + suffix, return_tensors='pt')['input_ids']
+            suffix_ids = generator.tokenizer(suffix, return_tensors='pt')['input_ids']
+            suffix_lengths.append(suffix_ids.shape[1])
+
+            full_times.append(median_seconds(lambda: generator.model(full_ids, use_cache=True), args.runs))
+            cached_times.append(median_seconds(
+                lambda: generator.model(suffix_ids, past_key_values=generator.copy_prefix_cache(1), use_cache=True),
+                args.runs
+            ))
+
+    full = statistics.median(full_times) * 1000
+    cached = statistics.median(cached_times) * 1000
+    print(f"model: {args.model}  quantized: {not args.no_quantize}")
+    print(f"prefix tokens: {prefix_tokens}  median suffix tokens: {statistics.median(suffix_lengths):.0f}")
+    print(f"{'full prefill (ms)':>20}{'cached prefix (ms)':>20}{'saved (ms)':>12}{'saved (%)':>11}")
+    print(f"{full:>20.1f}{cached:>20.1f}{full - cached:>12.1f}{(full - cached) / full * 100:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
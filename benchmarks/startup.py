@@ -0,0 +1,70 @@
+"""
+Startup benchmark: import-to-first-render time for the Streamlit apps
+
+Each run happens in a fresh interpreter so module imports are not shared
+between measurements. Run from the repository root:
+
+    python -m benchmarks.startup [--runs 5] [app.py app_simple.py]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["torch", "transformers", "google.generativeai"]
+
+# Executed in a child interpreter; prints one JSON line with the timings
+_DRIVER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+harness_loaded = set(sys.modules)
+app = AppTest.from_file(sys.argv[1], default_timeout=300)
+start = time.perf_counter()
+app.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "exception": bool(app.exception),
+    "heavy_modules": [m for m in json.loads(sys.argv[2]) if m in sys.modules and m not in harness_loaded],
+}))
+"""
+
+
+def measure(app_path, runs):
+    """Run an app `runs` times in fresh interpreters and collect timings"""
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _DRIVER, app_path, json.dumps(HEAVY_MODULES)],
+            cwd=repo_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("apps", nargs="*", default=["app.py", "app_simple.py"])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'app':<16}{'median (s)':>12}{'min (s)':>10}{'max (s)':>10}  heavy modules imported")
+    for app_path in args.apps:
+        results = measure(app_path, args.runs)
+        seconds = [r["seconds"] for r in results]
+        heavy = sorted({m for r in results for m in r["heavy_modules"]}) or ["none"]
+        failed = " (script raised)" if any(r["exception"] for r in results) else ""
+        print(f"{app_path:<16}{statistics.median(seconds):>12.3f}{min(seconds):>10.3f}"
+              f"{max(seconds):>10.3f}  {', '.join(heavy)}{failed}")
+
+
+if __name__ == "__main__":
+    main()
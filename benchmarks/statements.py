@@ -0,0 +1,73 @@
+"""
+Synthetic bank statements shaped like sample_expenses.csv
+
+Writes Date, Category, Amount, Description rows with realistic category
+and description values, in blocks so multi-million-row files are cheap to
+generate. Used by the ingestion benchmarks; can also be run directly:
+
+    python -m benchmarks.statements statement.csv --rows 1000000
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = {
+    "Food & Groceries": ["Weekly grocery shopping at supermarket", "Monthly grocery and household items",
+                         "Fresh vegetables and fruits from local market"],
+    "Transportation": ["Metro card recharge and auto fare", "Bus fare and parking charges",
+                       "Bus pass monthly subscription"],
+    "Entertainment": ["Movie tickets and dinner with friends", "Streaming subscription and book purchase"],
+    "Bills & Utilities": ["Electricity and internet bill payment", "Mobile recharge and water bill"],
+    "Shopping": ["New clothes and accessories purchase", "Electronics accessories and phone case"],
+    "Healthcare": ["Doctor consultation and medicines", "Pharmacy and lab tests"]
+}
+
+BLOCK_ROWS = 500_000
+
+
+def statement_block(rows, rng, start="2020-01-01", days=5 * 365):
+    """Return a DataFrame of `rows` synthetic transactions"""
+    names = list(CATEGORIES)
+    category_codes = rng.integers(0, len(names), rows)
+    descriptions = np.array([description for name in names for description in CATEGORIES[name]], dtype=object)
+    offsets = np.cumsum([0] + [len(CATEGORIES[name]) for name in names[:-1]])
+    counts = np.array([len(CATEGORIES[name]) for name in names])
+    description_codes = offsets[category_codes] + rng.integers(0, 1 << 30, rows) % counts[category_codes]
+
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    return pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Category": np.array(names, dtype=object)[category_codes],
+        "Amount": rng.integers(50, 10_000, rows),
+        "Description": descriptions[description_codes]
+    })
+
+
+def write_statement(path, rows, seed=0):
+    """Write a synthetic statement CSV with `rows` transactions and return its path"""
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        while written < rows:
+            block = statement_block(min(BLOCK_ROWS, rows - written), rng)
+            block.to_csv(f, header=written == 0, index=False)
+            written += len(block)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_statement(args.path, args.rows, args.seed)
+    print(f"Wrote {args.rows:,} rows ({os.path.getsize(args.path) / 1e6:.1f} MB) to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
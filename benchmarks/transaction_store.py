@@ -0,0 +1,73 @@
+"""
+Expense history memory: one dict per transaction vs the columnar TransactionStore
+
+Cleans a synthetic statement, then measures the memory held by
+to_dict('records') (traced allocations), the cleaned DataFrame and
+finance_engine.TransactionStore, and times a per-category total over each.
+Run from the repository root:
+
+    python -m benchmarks.transaction_store [--rows 1000000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.statements import statement_block
+from finance_engine import TransactionStore, clean_transactions
+
+
+def traced_bytes(build):
+    """Bytes still allocated after build() returns, and its result"""
+    tracemalloc.start()
+    result = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated, result
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def records_by_category(records):
+    totals = {}
+    for record in records:
+        totals[record['Category']] = totals.get(record['Category'], 0) + record['Amount']
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cleaned, _ = clean_transactions(statement_block(args.rows, np.random.default_rng(0)), "Amount", "Category", "Date")
+    records_size, records = traced_bytes(lambda: cleaned.to_dict('records'))
+    store_size, store = traced_bytes(lambda: TransactionStore.from_frame(cleaned))
+    frame_size = int(cleaned.memory_usage(deep=True).sum())
+
+    records_seconds, by_records = timed(lambda: records_by_category(records))
+    store_seconds, by_store = timed(store.by_category)
+    assert all(abs(by_records[category] - by_store[category]) < 0.01 for category in by_records)
+
+    print(f"{args.rows:,} transactions")
+    print(f"{'representation':<24}{'MB':>10}{'bytes/row':>12}{'by-category (ms)':>19}")
+    rows = [
+        ("list of dicts", records_size, f"{records_seconds * 1000:>19.1f}"),
+        ("cleaned DataFrame", frame_size, f"{'':>19}"),
+        ("TransactionStore", store_size, f"{store_seconds * 1000:>19.1f}"),
+        # The DataFrame has no dedup keys, so this is the like-for-like comparison
+        ("  without dedup keys", store_size - store.keys.nbytes, f"{'':>19}"),
+    ]
+    for name, size, seconds in rows:
+        print(f"{name:<24}{size / 1e6:>10.1f}{size / args.rows:>12.1f}{seconds}")
+    print("\nTransactionStore columns (bytes):", store.memory_usage())
+
+
+if __name__ == "__main__":
+    main()
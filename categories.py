@@ -0,0 +1,231 @@
+"""
+Expense category labels normalized to FINANCIAL_GUIDELINES keys, and
+categories guessed from transaction descriptions
+
+Labels differ between the apps, the sample data and bank exports ("Food &
+Groceries", "Food & Dining", "Transportation"...). One lookup table, built
+from the guideline keys and CATEGORY_ALIASES, maps a label to its guideline;
+a column is normalized by resolving each distinct label once and mapping
+the codes, so millions of rows cost one factorize and one take.
+
+Descriptions are categorized the same way: each distinct merchant (the
+description without digits and punctuation, so reference numbers and dates
+do not count) is classified once by the compiled keyword matcher from
+intents.py and remembered.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from config import CATEGORY_ALIASES, DESCRIPTION_KEYWORDS, FINANCIAL_GUIDELINES, INGEST_CONFIG
+from intents import IntentClassifier
+from uniques import map_uniques, resolve_cached
+
+# Labels not in the table go to the first guideline with a keyword inside the label
+GUIDELINE_KEYWORDS = [
+    ('housing', ('rent', 'housing')),
+    ('food', ('food', 'groceries')),
+    ('transport', ('transport',)),
+    ('entertainment', ('entertainment',)),
+    ('utilities', ('utilities',)),
+    ('shopping', ('shopping',))
+]
+DEFAULT_GUIDELINE = 'others'
+
+
+def normalize_label(label):
+    """Lower-case a label and collapse its whitespace"""
+    return " ".join(str(label).lower().split())
+
+
+class CategoryNormalizer:
+    """Maps category labels to guideline keys through a precomputed table"""
+
+    def __init__(self, aliases=None):
+        aliases = CATEGORY_ALIASES if aliases is None else aliases
+        self.guidelines = list(FINANCIAL_GUIDELINES['expense_ratios'])
+        self._table = {normalize_label(guideline): guideline for guideline in self.guidelines}
+        for guideline, labels in aliases.items():
+            for label in labels:
+                self._table[normalize_label(label)] = guideline
+
+    def key(self, label):
+        """Guideline key for one label"""
+        normalized = normalize_label(label)
+        guideline = self._table.get(normalized)
+        if guideline is not None:
+            return guideline
+        for guideline, keywords in GUIDELINE_KEYWORDS:
+            if any(keyword in normalized for keyword in keywords):
+                return guideline
+        return DEFAULT_GUIDELINE
+
+    def map(self, labels):
+        """Normalize a column of labels to a categorical of guideline keys; missing labels stay missing.
+
+        Each distinct label in the column is resolved once. Nothing is kept
+        between calls, so a high-cardinality column mapped as the category
+        costs no memory after its upload.
+        """
+        positions = map_uniques(labels, lambda uniques: [self.guidelines.index(self.key(label)) for label in uniques],
+                                -1, np.int8)
+        keys = pd.Categorical.from_codes(positions, categories=self.guidelines)
+        if isinstance(labels, pd.Series):
+            return pd.Series(keys, index=labels.index, name=labels.name)
+        return keys
+
+
+_normalizer = None
+_normalizer_lock = threading.Lock()
+
+
+def get_category_normalizer():
+    """Return the process-wide category normalizer, building its table on first use"""
+    global _normalizer
+    if _normalizer is None:
+        with _normalizer_lock:
+            if _normalizer is None:
+                _normalizer = CategoryNormalizer()
+    return _normalizer
+
+
+def normalize_categories(labels):
+    """Map a column of category labels to guideline keys"""
+    return get_category_normalizer().map(labels)
+
+
+DEFAULT_DESCRIPTION_CATEGORY = 'Others'
+
+
+def merchant_keys(descriptions):
+    """Lower-cased descriptions with digits and punctuation removed"""
+    # The str dtype runs these in pyarrow's vectorized kernels when it is installed
+    return (pd.Series(descriptions, dtype=str).str.lower()
+            .str.replace(r"[\d\W_]+", " ", regex=True).str.strip().to_numpy())
+
+
+def _classify_batch(classifier, merchants):
+    return [classifier.classify(merchant) for merchant in merchants]
+
+
+class DescriptionCategorizer:
+    """Assigns categories to descriptions, classifying each merchant once.
+
+    The merchant cache lives as long as the categorizer, so it carries over
+    between the chunks of an upload and between uploads; it is locked, as the
+    shared categorizer serves every session.
+    """
+
+    def __init__(self, keywords=None, default=DEFAULT_DESCRIPTION_CATEGORY, cache_size=None):
+        self.classifier = IntentClassifier(keywords or DESCRIPTION_KEYWORDS, default=default)
+        self.labels = list(dict.fromkeys(self.classifier.intents + [default]))
+        self.cache_size = cache_size or INGEST_CONFIG['categorizer_cache_size']
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def categorize(self, descriptions, workers=None):
+        """Categorize a column of descriptions; missing descriptions get no category"""
+        position = {label: code for code, label in enumerate(self.labels)}
+
+        def merchant_positions(merchants):
+            labels = resolve_cached(self._cache, merchants, lambda unknown: self._classify(unknown, workers),
+                                    self.cache_size, self._lock)
+            return [position[label] for label in labels]
+
+        # Each distinct description is reduced to its merchant, and each distinct merchant classified
+        positions = map_uniques(
+            descriptions, lambda uniques: map_uniques(merchant_keys(uniques), merchant_positions, -1, np.int8),
+            -1, np.int8
+        )
+        result = pd.Categorical.from_codes(positions, categories=self.labels)
+        if isinstance(descriptions, pd.Series):
+            return pd.Series(result, index=descriptions.index, name=descriptions.name)
+        return result
+
+    def _classify(self, merchants, workers=None):
+        """Classify merchants, in a process pool when there are enough of them"""
+        if workers is None:
+            workers = INGEST_CONFIG['categorizer_workers'] or os.cpu_count() or 1
+        if workers < 2 or len(merchants) < INGEST_CONFIG['categorizer_pool_min']:
+            return _classify_batch(self.classifier, merchants)
+        batches = np.array_split(np.array(merchants, dtype=object), workers * 4)
+        try:
+            results = get_categorizer_pool(workers).map(_classify_batch, [self.classifier] * len(batches), batches)
+            return [label for batch in results for label in batch]
+        except BrokenProcessPool:
+            # A worker died: start a fresh pool next time, classify this batch here
+            reset_categorizer_pool()
+            return _classify_batch(self.classifier, merchants)
+
+    def fill(self, categories, descriptions, workers=None):
+        """Fill missing or blank categories from the descriptions; returns a categorical Series"""
+        categories = pd.Series(categories, index=descriptions.index).astype('category')
+        blank = [label for label in categories.cat.categories if not str(label).strip()]
+        if blank:
+            categories = categories.cat.remove_categories(blank)
+        missing = categories.isna().to_numpy()
+        if not missing.any():
+            return categories
+
+        guessed = self.categorize(descriptions[missing], workers)
+        new_labels = [label for label in guessed.cat.categories if label not in categories.cat.categories]
+        categories = categories.cat.add_categories(new_labels)
+        categories[missing] = guessed.to_numpy()
+        return categories.cat.remove_unused_categories()
+
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def get_categorizer_pool(workers):
+    """Return the process-wide classification pool, starting it on first use.
+
+    The pool is kept for later chunks and uploads. Its workers are started
+    with forkserver (spawn where that is unavailable) rather than forked
+    from the multithreaded app server.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method))
+            _pool_workers = workers
+        return _pool
+
+
+def reset_categorizer_pool():
+    """Shut down the classification pool; the next large batch starts a new one"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_workers = None, None
+
+
+_categorizer = None
+_categorizer_lock = threading.Lock()
+
+
+def get_description_categorizer():
+    """Return the process-wide description categorizer, compiling its keywords on first use"""
+    global _categorizer
+    if _categorizer is None:
+        with _categorizer_lock:
+            if _categorizer is None:
+                _categorizer = DescriptionCategorizer()
+    return _categorizer
+
+
+def categorize_descriptions(descriptions, workers=None):
+    """Guess a category for each description with the shared categorizer"""
+    return get_description_categorizer().categorize(descriptions, workers)
@@ -2,14 +2,88 @@
 Configuration settings for the Financial Assistant
 """
 
+import os
+
+# Data and cache paths are relative to this file, not the working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Model Configuration
 MODEL_CONFIG = {
     "primary_model": "ibm/granite-3b-code-instruct",  # Granite model when available
     "fallback_model": "microsoft/DialoGPT-medium",    # Fallback model
     "max_length": 512,
+    "max_new_tokens": 200,          # Generation budget for the local model
+    "local_model_enabled": False,   # Answer with the local model when Gemini is not configured
+    "local_quantize": True,         # int8 dynamic quantization of the local model's linear layers
+    "local_num_threads": None,      # torch CPU threads for the local model (None = torch default)
+    "local_batch_size": 8,          # Most concurrent chat requests generated together
+    "local_batch_wait_ms": 20,      # How long the first request waits for others to join its batch
+    "local_prefix_cache": True,     # Reuse the advisor prompt prefix's key/value cache across requests
+    "history_turns": 3,             # Recent chat turns sent to the model verbatim
+    "history_token_budget": 600,    # Most tokens of chat history (summary + recent turns) per prompt
+    "history_summary_tokens": 200,  # Size of the running summary of older turns
     "temperature": 0.7,
     "do_sample": True,
-    "pad_token_id": 50256
+    "pad_token_id": 50256,
+    "gemini_models": ["gemini-1.5-flash", "gemini-1.0-pro", "gemini-pro"],  # Tried in order
+    "client_pool_size": 32,        # Max API keys with a cached Gemini client per process
+    "client_idle_seconds": 1800,   # Drop cached clients unused for this long
+    "key_probe_timeout": 5.0,      # Deadline (seconds) for validating an API key
+    "key_verdict_ttl": 900,        # Seconds an API key validation result is reused
+    "llm_request_timeout": 60,     # Seconds to wait for the next streamed chunk
+    "rate_limit_per_second": 2.0,  # Sustained Gemini calls per second for this process
+    "rate_limit_burst": 10,        # Calls allowed back-to-back before throttling starts
+    "rate_limit_queue": 50,        # Max calls waiting for a token across all sessions
+    "rate_limit_queue_per_session": 1,
+    "rate_limit_budget": 2.0,      # Max seconds to queue before using the rule-based answer
+    "breaker_window": 20,          # Recent Gemini calls the circuit breaker looks at
+    "breaker_min_calls": 5,        # Calls needed before the breaker may open
+    "breaker_error_rate": 0.5,     # Open when at least this share of calls fail...
+    "breaker_slow_seconds": 8.0,   # ...or when calls this slow to first token...
+    "breaker_slow_rate": 0.5,      # ...make up at least this share
+    "breaker_open_seconds": 30,    # Skip Gemini this long before a trial call
+    "hedge_ms": 0,                 # >0: show the rule-based answer at once, replace it if Gemini starts within this many ms
+    "gemini_api_endpoint": None,   # Override the API host, e.g. "http://127.0.0.1:8765" for benchmarks/fake_gemini.py
+    "warm_up_backends": []  # e.g. ["gemini"] to import the SDK in a background thread at startup
+}
+
+# Response Cache Configuration
+CACHE_CONFIG = {
+    "response_cache_path": os.path.join(BASE_DIR, ".cache", "responses.sqlite3"),
+    "memory_entries": 256,            # Answers kept in the in-process LRU
+    "ttl_seconds": 24 * 60 * 60,      # Cached answers expire after a day
+    "max_disk_bytes": 50_000_000,     # Oldest answers are evicted beyond this size
+    "income_bands": [15000, 30000, 60000, 100000, 200000, 500000],  # Monthly income band edges (₹)
+    "upload_cache_bytes": 256_000_000  # Parsed CSV uploads kept in memory across reruns
+}
+
+# Offline FAQ retrieval for questions the rule-based intents don't cover
+RETRIEVAL_CONFIG = {
+    "faq_path": os.path.join(BASE_DIR, "finance_faq.json"),  # Curated finance Q&A corpus
+    "index_dir": os.path.join(BASE_DIR, ".cache", "faq_index"),  # Saved .npy vectors, memory-mapped on load
+    "dimensions": 2 ** 14,            # Hashed feature space for n-gram TF-IDF vectors
+    "top_k": 3,                       # Best answer plus related questions
+    "min_score": 0.25                 # Cosine similarity below this falls back to the greeting
+}
+
+# Uploaded expense statements are streamed in chunks, so memory use does not grow with file size
+INGEST_CONFIG = {
+    "chunk_size": 100_000,            # Rows parsed and cleaned at a time
+    "preview_rows": 5,                # Rows read up front for the preview and column mapping
+    "history_max_rows": 2_000_000,    # Larger uploads keep only aggregates, not per-row history
+    "pyarrow_min_bytes": 32_000_000,  # Files this large use the pyarrow parser when it is installed
+    "pyarrow_block_bytes": 4_000_000, # Bytes of CSV per pyarrow chunk (~60k rows)
+    "categorizer_cache_size": 1_000_000, # Distinct merchants whose category is remembered
+    "categorizer_pool_min": 20_000,   # New merchants in one call (e.g. one upload chunk) before using the process pool
+    "categorizer_workers": None,      # Process pool size; None = one per CPU
+    "date_sample_size": 1000,         # Distinct date strings sampled to sniff each format
+    "date_cache_size": 1_000_000,     # Distinct date strings remembered per upload
+    # Candidate date formats, most likely first; day-first before month-first for Indian banks
+    "date_formats": [
+        "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d %b %Y", "%d-%b-%Y", "%d %B %Y",
+        "%d/%m/%y", "%d-%m-%y", "%Y/%m/%d", "%Y%m%d", "%m/%d/%Y", "%b %d, %Y",
+        "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M"
+    ]
 }
 
 # Financial Guidelines
@@ -31,6 +105,64 @@ FINANCIAL_GUIDELINES = {
     }
 }
 
+# Category labels used across the apps, sample data and bank exports, per FINANCIAL_GUIDELINES
+# expense ratio key; matched ignoring case and spacing
+CATEGORY_ALIASES = {
+    "housing": ["Rent/Housing", "Rent", "Housing", "Home Loan EMI", "Maintenance"],
+    "food": ["Food & Groceries", "Food & Dining", "Food", "Groceries", "Dining", "Restaurants"],
+    "transport": ["Transport", "Transportation", "Fuel", "Commute", "Travel"],
+    "entertainment": ["Entertainment", "Movies", "Streaming"],
+    "utilities": ["Utilities", "Bills & Utilities", "Bills", "Electricity", "Mobile Recharge"],
+    "shopping": ["Shopping", "Clothing", "Electronics"],
+    "others": ["Others", "Other", "Healthcare", "Miscellaneous"]
+}
+
+# Keyword weights for categorizing transactions by their description (see categories.py);
+# labels are CATEGORY_ALIASES labels, and descriptions matching nothing become "Others"
+DESCRIPTION_KEYWORDS = {
+    "Rent/Housing": {"rent": 2, "landlord": 2, "maintenance": 1, "society": 1, "home loan": 2},
+    "Food & Groceries": {"grocery": 2, "groceries": 2, "supermarket": 2, "vegetable": 2, "fruit": 1,
+                         "restaurant": 2, "dinner": 1, "lunch": 1, "cafe": 1, "food": 1, "swiggy": 2,
+                         "zomato": 2, "bigbasket": 2, "blinkit": 2, "zepto": 2},
+    "Transportation": {"metro": 2, "bus": 2, "auto": 1, "fare": 1, "cab": 2, "taxi": 2, "uber": 2, "ola": 2,
+                       "rapido": 2, "petrol": 2, "fuel": 2, "parking": 1, "toll": 1, "train": 1, "irctc": 2},
+    "Entertainment": {"movie": 2, "ticket": 0.5, "streaming": 2, "subscription": 0.5, "netflix": 2,
+                      "spotify": 2, "hotstar": 2, "bookmyshow": 2, "concert": 2, "book": 1},
+    "Bills & Utilities": {"electricity": 2, "bill": 1, "internet": 2, "broadband": 2, "wifi": 2, "water": 1,
+                          "gas": 1, "mobile": 1, "recharge": 1, "postpaid": 2, "dth": 2},
+    "Shopping": {"clothes": 2, "clothing": 2, "accessories": 1, "electronics": 2, "phone case": 2,
+                 "shoes": 2, "purchase": 0.5, "amazon": 2, "flipkart": 2, "myntra": 2, "mall": 1},
+    "Healthcare": {"doctor": 2, "medicine": 2, "pharmacy": 2, "hospital": 2, "clinic": 2, "lab test": 2,
+                   "consultation": 1, "dental": 2}
+}
+
+# Expected annual SIP return (%) and suggested allocation per risk tolerance
+INVESTMENT_PROFILES = {
+    "conservative": {
+        "expected_return": 7,
+        "allocation": [(60, "Debt Funds/FDs"), (30, "Large Cap Equity"), (10, "Gold ETF")]
+    },
+    "moderate": {
+        "expected_return": 10,
+        "allocation": [(50, "Equity Funds"), (30, "Debt Funds"), (20, "International/Gold")]
+    },
+    "aggressive": {
+        "expected_return": 13,
+        "allocation": [(70, "Equity Funds"), (20, "Mid/Small Cap"), (10, "Debt Funds")]
+    }
+}
+
+# Chat intent keywords for the rule-based engine, in tie-break order. A keyword
+# matches at the start of a word ("invest" also matches "investing"); an intent
+# scores the sum of its matched keywords' weights.
+INTENT_KEYWORDS = {
+    "savings": {"save": 1, "saving": 1, "laptop": 1, "phone": 1},
+    "investment": {"invest": 1, "sip": 1, "mutual fund": 2, "portfolio": 1},
+    "budget": {"budget": 1, "expense": 1, "spend": 1, "overspend": 1, "money": 0.5},
+    "emergency": {"emergency": 2, "fund": 0.5, "crisis": 1},
+    "tax": {"tax": 2, "80c": 2, "elss": 1, "deduction": 1}
+}
+
 # Response Templates
 RESPONSE_TEMPLATES = {
     "student": {
@@ -49,6 +181,299 @@ RESPONSE_TEMPLATES = {
     }
 }
 
+# Rule-based chat answers, one place for both apps. Each intent maps variant keys
+# to str.format templates; the most specific key wins, in the order
+# "demographic:risk_tolerance", "demographic", "default:risk_tolerance", "default".
+# Fields: income, age, share_N (N% of monthly income), sip (monthly SIP amount),
+# equity_pct/debt_pct and equity_amount/debt_amount (age-based split of 20% of
+# income), emergency_target and emergency_monthly (6 months of expenses, over 1 year).
+ANSWER_TEMPLATES = {
+    "savings": {
+        "student": """Great question! As a student, here are some practical saving tips:
+
+💡 **Start Small**: Try saving ₹500-1000 monthly by:
+- Cooking at home instead of ordering food (save ₹2000+/month)
+- Using student discounts everywhere
+- Sharing subscriptions with friends
+- Walking/cycling instead of taking auto/cab
+
+📱 **For specific goals**:
+- Laptop (₹40,000): Save ₹3,500/month for 12 months
+- Phone (₹15,000): Save ₹2,500/month for 6 months
+- Emergency fund: Start with ₹500/month
+
+🎯 **Pro tip**: Use the 50-30-20 rule adapted for students:
+- 50% for essentials (₹{share_50:,.0f})
+- 30% for fun/wants (₹{share_30:,.0f})
+- 20% for savings (₹{share_20:,.0f})
+
+Would you like me to create a personalized budget plan for you?""",
+        "default": """Based on your professional profile, here's a structured savings approach:
+
+💼 **The 50-30-20 Rule**:
+- 50% for needs (₹{share_50:,.0f})
+- 30% for wants (₹{share_30:,.0f})  
+- 20% for savings (₹{share_20:,.0f})
+
+🎯 **Investment Options**:
+- Emergency fund: 6 months expenses in high-yield savings
+- SIP in index funds: ₹{sip:,.0f}/month
+- PPF for tax savings: Up to ₹1.5 lakh/year
+- ELSS funds: Tax-saving mutual funds
+
+📈 **Advanced strategies**:
+- Diversify across large-cap, mid-cap, and international funds
+- Consider debt funds for stability
+- Use systematic transfer plans (STP) for better timing
+
+Would you like a detailed investment breakdown based on your ₹{income:,} income?"""
+    },
+    "investment": {
+        "student:conservative": """As a student with conservative risk preference:
+
+🛡️ **Safe Start**:
+- Begin with ₹500/month in debt funds
+- Fixed deposits for emergency fund
+- PPF for long-term tax savings
+
+📚 **Learn & Grow**: 
+- Start with 80% debt, 20% equity
+- Use SIP to average out market volatility
+- Focus on large-cap funds initially""",
+        "student:aggressive": """As a student ready for higher risk:
+
+🚀 **Growth Focus**:
+- Start with ₹1000/month in equity funds
+- 70% equity, 30% debt allocation
+- Consider small-cap funds for higher returns
+
+⚡ **High Growth Strategy**:
+- Index funds + sectoral funds
+- Start early for compound growth advantage
+- Review and increase SIP annually""",
+        "student:moderate": """As a student with moderate risk appetite:
+
+⚖️ **Balanced Approach**:
+- Start with ₹500-1000/month SIP
+- 50% equity, 50% debt allocation
+- Mix of large-cap and mid-cap funds
+
+📈 **Steady Growth**: 
+- Use apps like Groww or Zerodha Coin
+- Increase investment as income grows
+- Focus on consistency over amount""",
+        "student": """As a student, start with these simple investment steps:
+
+🌱 **Begin Small**:
+- Start with ₹500-1000/month SIP
+- Choose index funds (low cost, diversified)
+- Use apps like Groww, Zerodha Coin, or Paytm Money
+
+📚 **Learn First**: 
+- Understand risk vs returns
+- Start with large-cap funds (safer for beginners)
+- Avoid individual stock picking initially
+- Read about compound interest - it's magical! ✨
+
+🎯 **Sample portfolio for students**:
+- 70% Large-cap index funds
+- 20% Mid-cap funds
+- 10% International funds
+
+Remember: Time in market > timing the market!""",
+        "default:conservative": """Conservative investment strategy for ₹{income:,} income:
+
+🛡️ **Low-Risk Portfolio**:
+- Debt funds (60%): ₹{share_12:,.0f}/month
+- Large-cap equity (30%): ₹{share_6:,.0f}/month  
+- Gold ETF (10%): ₹{share_2:,.0f}/month
+
+🏛️ **Tax-Efficient Options**:
+- PPF: ₹12,500/month for 15-year lock-in
+- ELSS: Tax-saving with 3-year lock-in
+- NSC/FD: For stable returns""",
+        "default:aggressive": """Aggressive growth strategy for ₹{income:,} income:
+
+🚀 **High-Growth Portfolio**:
+- Equity funds (70%): ₹{share_14:,.0f}/month
+- Mid/Small cap (20%): ₹{share_4:,.0f}/month
+- International funds (10%): ₹{share_2:,.0f}/month
+
+📈 **Growth Focus**:
+- Sectoral funds for higher returns
+- Direct equity for experienced investors
+- Regular portfolio rebalancing""",
+        "default:moderate": """Balanced investment strategy for ₹{income:,} income:
+
+⚖️ **Moderate Portfolio**:
+- Equity funds (60%): ₹{share_12:,.0f}/month
+- Debt funds (30%): ₹{share_6:,.0f}/month
+- Gold/International (10%): ₹{share_2:,.0f}/month
+
+🎯 **Tax-Saving Options**:
+- ELSS funds: Up to ₹1.5L under 80C
+- PPF: 15-year lock-in, tax-free returns
+- NPS: Additional ₹50K deduction under 80CCD""",
+        "default": """Here's a professional investment strategy for your ₹{income:,} monthly income:
+
+📊 **Asset Allocation by Age ({age} years)**:
+- Equity: {equity_pct}% (₹{equity_amount:,.0f}/month)
+- Debt: {age}% (₹{debt_amount:,.0f}/month)
+
+🏛️ **Tax-Saving Options**:
+- ELSS funds: Up to ₹1.5L under Section 80C
+- PPF: 15-year lock-in, tax-free returns
+- NPS: Additional ₹50K deduction under 80CCD(1B)
+- ULIP: Insurance + investment (consider carefully)
+
+💰 **Monthly Investment Plan**:
+- Large-cap funds: ₹{share_8:,.0f}
+- Mid-cap funds: ₹{share_5:,.0f}
+- International funds: ₹{share_3:,.0f}
+- Debt funds: ₹{share_4:,.0f}
+
+Want me to create a detailed portfolio allocation?"""
+    },
+    "budget": {
+        "default": """I'd love to help you create a comprehensive budget! 📊
+
+📝 **Let's gather your financial info**:
+- Monthly income (already have: ₹{income:,})
+- Fixed expenses (rent, utilities, EMIs)
+- Variable expenses (food, transport, entertainment)
+- Savings goals
+
+You can either:
+1. Tell me your numbers in this chat
+2. Use the "Budget Analyzer" form in the sidebar
+
+Once I have your data, I'll create:
+- 📊 Visual budget breakdown (pie charts, bar graphs)
+- 📈 Spending analysis with recommendations
+- 💡 Personalized tips to optimize your finances
+- 🎯 Goal-based savings plan
+
+Try the budget form now and I'll give you instant insights!"""
+    },
+    "emergency": {
+        "student": """Emergency funds are super important, even for students! 🚨
+
+🎯 **Your target**: ₹{emergency_target:,.0f} (6 months of expenses)
+💰 **Monthly saving needed**: ₹{emergency_monthly:,.0f} to build it in 1 year
+
+📍 **Where to keep it**:
+- High-yield savings account (4-6% interest)
+- Liquid funds (slightly better returns)
+- Fixed deposits (if you won't need it soon)
+
+🚀 **Quick start**: Begin with ₹1000/month and increase gradually!""",
+        "default": """Emergency fund is crucial for financial stability! 🛡️
+
+🎯 **Your target**: ₹{emergency_target:,.0f} (6 months of expenses)
+💰 **Monthly allocation**: ₹{emergency_monthly:,.0f} to build in 1 year
+
+📍 **Best places to keep emergency funds**:
+- High-yield savings accounts (SBI, HDFC, ICICI)
+- Liquid mutual funds (instant redemption)
+- Ultra-short duration funds
+- Sweep-in fixed deposits
+
+⚡ **Pro tip**: Keep 3 months in savings account, 3 months in liquid funds for better returns!"""
+    },
+    "tax": {
+        "professional": """Tax optimization is key for professionals! 💼
+
+🏛️ **Section 80C (₹1.5L limit)**:
+- PPF: ₹12,500/month (15-year lock, tax-free returns)
+- ELSS: ₹12,500/month (3-year lock, market returns)
+- Life insurance: Term + health insurance premiums
+- Home loan principal repayment
+
+💰 **Additional deductions**:
+- 80D: Health insurance (₹25K-₹50K)
+- 80CCD(1B): NPS (additional ₹50K)
+- 80G: Donations to eligible charities
+
+📊 **Your potential savings** (assuming 30% tax bracket):
+- Section 80C: Save ₹45,000 in taxes
+- Total deductions: Up to ₹2L+ possible
+
+Want me to calculate your exact tax savings?""",
+        "default": """Tax planning for students is simpler but still important! 🎓
+
+📚 **Key points**:
+- Income up to ₹2.5L is tax-free
+- Keep receipts for tuition fees (80C deduction)
+- Health insurance premiums count (80D)
+
+💡 **Future planning**:
+- Start learning about tax-saving investments
+- Consider opening PPF account early
+- Understand basics of income tax
+
+You're in a great position to learn and plan ahead! 🚀"""
+    },
+    "general": {
+        "general": """Hello! I'm your personal finance assistant. 👋
+
+Set up your profile in the sidebar for personalized advice. I can help you with:
+- 💰 Savings strategies
+- 📈 Investment advice  
+- 📊 Budget planning
+- 💡 Spending insights
+
+What would you like to know about? Feel free to ask questions like:
+- "How do I save for a laptop?"
+- "What investments should I consider?"
+- "Help me create a budget"
+- "How much should I spend on entertainment?"
+
+I'm here to provide personalized advice based on your situation!""",
+        "student": """Hello! I'm your personal finance assistant. 👋
+
+As a student with ₹{income:,} monthly income, I can help you with:
+- 💰 Smart saving strategies for students
+- 📱 Saving for gadgets (laptops, phones)
+- 📊 Simple budgeting techniques
+- 🎯 Building good financial habits early
+
+**Quick tips for you**:
+- Start saving even ₹500/month - it builds discipline!
+- Use student discounts everywhere
+- Learn about SIPs and compound interest
+- Build an emergency fund gradually
+
+**What would you like to explore?**
+- "How do I save for [specific goal]?"
+- "What investments should I consider?"
+- "Help me create a budget"
+- "How can I save on taxes?"
+
+Feel free to use the sidebar to set up your profile and analyze your budget! 📊""",
+        "default": """Hello! I'm your personal finance assistant. 👋
+
+As a professional with ₹{income:,} monthly income, I can help you with:
+- 📈 Investment portfolio optimization
+- 🏛️ Tax-saving strategies
+- 🏠 Home buying and loan planning
+- 💼 Retirement and wealth building
+
+**Key focus areas**:
+- Maximize your 80C deductions (₹1.5L)
+- Build diversified investment portfolio
+- Plan for major life goals
+- Optimize your tax efficiency
+
+**What would you like to explore?**
+- "How do I save for [specific goal]?"
+- "What investments should I consider?"
+- "Help me create a budget"
+- "How can I save on taxes?"
+
+Feel free to use the sidebar to set up your profile and analyze your budget! 📊"""
+    }
+}
+
 # Sample Profiles for Testing
 SAMPLE_PROFILES = {
     "student": {
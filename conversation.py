@@ -0,0 +1,127 @@
+"""
+Bounded chat history for LLM prompts
+"""
+
+import re
+from collections import deque
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) when no tokenizer is at hand"""
+    return (len(text) + 3) // 4
+
+
+def excerpt(text, max_chars=160):
+    """First sentence of a message, without markdown, cut at a word boundary"""
+    text = " ".join(re.sub(r"[*_#`>]", "", text).split())
+    sentence = re.match(r".+?[.!?](?=\s|$)", text)
+    if sentence:
+        text = sentence.group(0)
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "…"
+    return text
+
+
+def clip(text, max_tokens, count_tokens=estimate_tokens):
+    """Longest prefix of text within max_tokens, cut at a word boundary and marked with an ellipsis"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle] + "…") <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = text[:low]
+    # Back up to a word boundary unless that would lose most of the prefix
+    word_start = prefix.rfind(" ")
+    if not text[low].isspace() and word_start > low // 2:
+        prefix = prefix[:word_start]
+    prefix = prefix.rstrip()
+    return prefix + "…" if prefix else ""
+
+
+class ConversationMemory:
+    """Keeps the last few turns verbatim and folds older ones into a running summary.
+
+    Folded turns are reduced to one short line each (question and the first
+    sentence of the answer), and the summary drops its oldest lines beyond
+    `summary_tokens`, so the memory stays the same size however long a session
+    runs. render() fits `token_budget` with the caller's tokenizer.
+    """
+
+    def __init__(self, recent_turns=3, token_budget=600, summary_tokens=200):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.turns = deque()
+        self.summary = deque()
+        self.turn_count = 0
+
+    def __len__(self):
+        return self.turn_count
+
+    def add_turn(self, question, answer):
+        """Remember a finished question/answer pair"""
+        self.turns.append((question, answer))
+        self.turn_count += 1
+        while len(self.turns) > self.recent_turns:
+            self._fold(*self.turns.popleft())
+
+    def render(self, count_tokens=estimate_tokens):
+        """History as prompt text within token_budget.
+
+        Recent turns that do not fit are folded into the summary like older
+        ones, the summary keeps to its share of the budget, and a newest turn
+        too long on its own is clipped rather than dropped.
+        """
+        summary_budget = min(self.summary_tokens, self.token_budget)
+        summary = list(self.summary)
+        turns = list(self.turns)
+        while True:
+            summary = self._cap(summary, summary_budget, count_tokens)
+            text = self._format(summary, turns)
+            if count_tokens(text) <= self.token_budget or len(turns) <= 1:
+                break
+            summary.append(self._summary_line(*turns.pop(0)))
+
+        if count_tokens(text) > self.token_budget and turns:
+            question, answer = turns[0]
+            room = self.token_budget - count_tokens(self._format(summary, [(question, "")]))
+            text = self._format(summary, [(question, clip(answer, room, count_tokens))])
+        # Only a question longer than the whole budget gets here
+        return clip(text, self.token_budget, count_tokens)
+
+    def clear(self):
+        self.turns.clear()
+        self.summary.clear()
+        self.turn_count = 0
+
+    def _fold(self, question, answer):
+        """Move a turn into the summary, dropping the oldest summary lines over budget"""
+        self.summary.append(self._summary_line(question, answer))
+        while len(self.summary) > 1 and estimate_tokens("\n".join(self.summary)) > self.summary_tokens:
+            self.summary.popleft()
+
+    @staticmethod
+    def _summary_line(question, answer):
+        return f"- User asked: {excerpt(question)} Advisor: {excerpt(answer)}"
+
+    @staticmethod
+    def _cap(summary, max_tokens, count_tokens):
+        """Drop the oldest summary lines over max_tokens, clipping a last line still too long"""
+        while len(summary) > 1 and count_tokens("\n".join(summary)) > max_tokens:
+            summary.pop(0)
+        if summary and count_tokens(summary[0]) > max_tokens:
+            summary = [clip(summary[0], max_tokens, count_tokens)]
+        return summary
+
+    @staticmethod
+    def _format(summary, turns):
+        parts = []
+        if summary:
+            parts.append("Earlier in this conversation:\n" + "\n".join(summary))
+        for question, answer in turns:
+            parts.append(f"User: {question}\nAdvisor: {answer}")
+        return "\n\n".join(parts)
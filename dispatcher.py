@@ -0,0 +1,188 @@
+"""
+Asyncio dispatcher for upstream LLM calls shared by all Streamlit sessions
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+from config import MODEL_CONFIG
+
+_END = object()
+
+
+class FirstChunkTimeout(TimeoutError):
+    """Raised when a stream produces nothing before the caller's first-chunk deadline"""
+
+
+class _Flight:
+    """One upstream call in progress; late subscribers replay the chunks so far"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.started_at = time.monotonic()
+        self.first_chunk_at = None
+        self.finished_at = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+    @property
+    def first_chunk_latency(self):
+        """Seconds until the first chunk arrived, or None if none did"""
+        if self.first_chunk_at is None:
+            return None
+        return self.first_chunk_at - self.started_at
+
+    def subscribe(self):
+        subscriber = queue.Queue()
+        with self._lock:
+            for chunk in self.chunks:
+                subscriber.put(chunk)
+            if self.done:
+                subscriber.put(_END)
+            else:
+                self._subscribers.append(subscriber)
+        return subscriber
+
+    def publish(self, chunk):
+        with self._lock:
+            if self.first_chunk_at is None:
+                self.first_chunk_at = time.monotonic()
+            self.chunks.append(chunk)
+            for subscriber in self._subscribers:
+                subscriber.put(chunk)
+
+    def close(self, error=None):
+        with self._lock:
+            self.finished_at = time.monotonic()
+            self.done = True
+            self.error = error
+            for subscriber in self._subscribers:
+                subscriber.put(_END)
+            self._subscribers = []
+
+
+class LLMDispatcher:
+    """Runs upstream calls on a dedicated event-loop thread and coalesces identical keys"""
+
+    def __init__(self, chunk_timeout=60):
+        self.chunk_timeout = chunk_timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {'upstream_calls': 0, 'coalesced': 0}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-dispatcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def stream(self, key, factory, on_done=None, first_chunk_timeout=None, on_start=None):
+        """Yield text chunks for `key`, starting `factory()` (an async iterator) only if
+        no identical request is already in flight.
+
+        `on_start()` runs (on the calling thread) only when this request starts a
+        new call, before it is sent; if it raises, no call is made and requests
+        that joined in the meantime get the same error. `on_done(flight)` runs on
+        the loop thread when a call this request started finishes, even if the
+        caller stopped reading. `first_chunk_timeout` raises FirstChunkTimeout if
+        nothing arrives in time; the call itself keeps running.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            started = flight is None
+            if started:
+                # Registered before on_start runs, so identical requests join this one
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self._stats['coalesced'] += 1
+            subscriber = flight.subscribe()
+
+        if started:
+            try:
+                if on_start is not None:
+                    # Outside the lock: it may wait, e.g. for a rate limiter token
+                    on_start()
+            except Exception as e:
+                with self._lock:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                flight.close(e)
+                raise
+            with self._lock:
+                self._stats['upstream_calls'] += 1
+            # Timed from here, so waiting in on_start does not count as upstream latency
+            flight.started_at = time.monotonic()
+            asyncio.run_coroutine_threadsafe(self._run(key, flight, factory, on_done), self._loop)
+        return self._drain(flight, subscriber, first_chunk_timeout)
+
+    def stats(self):
+        """Return upstream call and coalescing counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._flights)
+        return stats
+
+    def _drain(self, flight, subscriber, first_chunk_timeout=None):
+        """Blocking iterator over a subscriber queue for the calling script thread"""
+        timeout = self.chunk_timeout
+        if first_chunk_timeout is not None:
+            timeout = min(first_chunk_timeout, timeout)
+        first = True
+        while True:
+            try:
+                chunk = subscriber.get(timeout=timeout)
+            except queue.Empty:
+                if first and first_chunk_timeout is not None:
+                    raise FirstChunkTimeout(f"No response from the model within {first_chunk_timeout}s")
+                raise TimeoutError(f"No response from the model within {self.chunk_timeout}s")
+            if chunk is _END:
+                if flight.error is not None:
+                    raise flight.error
+                return
+            first = False
+            timeout = self.chunk_timeout
+            yield chunk
+
+    async def _run(self, key, flight, factory, on_done=None):
+        error = None
+        try:
+            async for chunk in factory():
+                flight.publish(chunk)
+        except Exception as e:
+            error = e
+        finally:
+            # Stop coalescing before waking subscribers so a retry starts a fresh call
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.close(error)
+        if on_done is not None:
+            try:
+                on_done(flight)
+            except Exception:
+                # Bookkeeping must never take down the shared event loop
+                pass
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Return the process-wide dispatcher, starting its event loop on first use"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = LLMDispatcher(chunk_timeout=MODEL_CONFIG['llm_request_timeout'])
+    return _dispatcher
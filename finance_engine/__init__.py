@@ -0,0 +1,46 @@
+"""
+Headless finance engine shared by the Streamlit apps
+
+Everything here takes plain values (dicts of category amounts, profile
+fields, DataFrames) and returns plain dicts and lists, with no Streamlit
+import, so the analysis can be reused, batched and benchmarked outside a
+running app. The apps only collect inputs and render the results.
+"""
+
+from finance_engine.alerts import spending_alerts
+from finance_engine.budget import analyze_budget, budget_context, budget_insights, category_checks, savings_status
+from finance_engine.dates import DateParser, parse_dates, sniff_format
+from finance_engine.dedup import RowKeySet, row_keys
+from finance_engine.monthly import monthly_breakdown, monthly_insights, summarize_month
+from finance_engine.planning import goal_progress, new_goal, simulate_what_if, sip_plan
+from finance_engine.store import TransactionStore
+from finance_engine.transactions import (
+    TransactionTotals, clean_transactions, read_preview, stream_transactions, summarize_transactions
+)
+
+__all__ = [
+    'DateParser',
+    'RowKeySet',
+    'TransactionStore',
+    'TransactionTotals',
+    'analyze_budget',
+    'budget_context',
+    'budget_insights',
+    'category_checks',
+    'clean_transactions',
+    'goal_progress',
+    'monthly_breakdown',
+    'monthly_insights',
+    'new_goal',
+    'parse_dates',
+    'read_preview',
+    'row_keys',
+    'savings_status',
+    'simulate_what_if',
+    'sip_plan',
+    'sniff_format',
+    'spending_alerts',
+    'stream_transactions',
+    'summarize_month',
+    'summarize_transactions'
+]
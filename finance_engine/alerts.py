@@ -0,0 +1,32 @@
+"""
+Spending alerts from a budget analysis and a monthly summary
+"""
+
+# Alert label for a category over its guideline, keyed by guideline
+ALERT_LABELS = {
+    'housing': "🏠 **Housing Alert**",
+    'food': "🍽️ **Food Alert**",
+    'entertainment': "🎬 **Entertainment Alert**"
+}
+
+# Share of a month's expenses in one category that triggers a concentration alert
+CONCENTRATION_LIMIT = 0.5
+
+
+def spending_alerts(budget=None, monthly=None):
+    """Return alert messages for an analyze_budget() and a summarize_month() result"""
+    alerts = []
+
+    if budget:
+        for check in budget['categories']:
+            if check['over_limit'] and check['guideline'] in ALERT_LABELS:
+                alerts.append(f"{ALERT_LABELS[check['guideline']]}: {check['ratio']:.1f}% of income "
+                              f"(recommended: <{check['limit']}%)")
+
+    if monthly and monthly['total'] > 0:
+        share = monthly['top_amount'] / monthly['total']
+        if share > CONCENTRATION_LIMIT:
+            alerts.append(f"⚠️ **Concentration Alert**: {monthly['top_category']} represents "
+                          f"{share * 100:.1f}% of total expenses")
+
+    return alerts
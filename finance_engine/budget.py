@@ -0,0 +1,95 @@
+"""
+Monthly budget metrics, per-category guideline checks and insights
+"""
+
+from config import FINANCIAL_GUIDELINES
+from utils import BudgetAnalyzer
+
+# Insight and recommendation for a category over its guideline, keyed by guideline
+CATEGORY_INSIGHTS = {
+    'housing': ("🏠 Housing costs ({ratio:.1f}%) are high - ideally should be under 30%.",
+                "Consider finding more affordable housing or getting roommates."),
+    'food': ("🍽️ Food expenses ({ratio:.1f}%) are above recommended 10-15%.",
+             "Try meal planning and cooking at home more often."),
+    'entertainment': ("🎬 Entertainment spending ({ratio:.1f}%) is quite high.",
+                      "Look for free or low-cost entertainment options.")
+}
+
+
+def savings_status(savings_rate):
+    """Name the FINANCIAL_GUIDELINES savings band a rate falls in, or 'overspending'"""
+    bands = sorted(FINANCIAL_GUIDELINES['savings_rate'].items(), key=lambda band: band[1], reverse=True)
+    for status, minimum in bands:
+        if savings_rate >= minimum:
+            return status
+    return 'overspending'
+
+
+def category_checks(expense_ratios):
+    """Compare each category's share of income with its guideline limit"""
+    guidelines = FINANCIAL_GUIDELINES['expense_ratios']
+    checks = []
+    for category, ratio in expense_ratios.items():
+        guideline = BudgetAnalyzer.guideline_key(category)
+        limit = guidelines.get(guideline, 10)
+        checks.append({
+            'category': category,
+            'guideline': guideline,
+            'ratio': ratio,
+            'limit': limit,
+            'excess': ratio - limit,
+            'over_limit': ratio > limit
+        })
+    return checks
+
+
+def analyze_budget(income, expenses):
+    """Analyze a monthly income against {category: amount} expenses.
+
+    The result keeps the `income`, `expenses`, `total_expenses` and `savings`
+    keys the apps store as budget data, and adds the savings and expense
+    ratios, the savings band and a guideline check per category.
+    """
+    metrics = BudgetAnalyzer.calculate_budget_metrics(income, expenses)
+    total_expenses = metrics['total_expenses']
+    return {
+        'income': income,
+        'expenses': dict(expenses),
+        'total_expenses': total_expenses,
+        'savings': metrics['savings'],
+        'savings_rate': metrics['savings_rate'],
+        'expense_ratio': (total_expenses / income * 100) if income > 0 else 0,
+        'savings_status': savings_status(metrics['savings_rate']),
+        'is_overspending': metrics['is_overspending'],
+        'categories': category_checks(metrics['expense_ratios'])
+    }
+
+
+def budget_insights(budget):
+    """Return (insights, recommendations) text for an analyze_budget() result"""
+    insights = []
+    recommendations = []
+
+    status = budget['savings_status']
+    if status in ('overspending', 'poor'):
+        insights.append("⚠️ Your savings rate is below 10% - this is concerning for long-term financial health.")
+        recommendations.append("Try to increase your savings to at least 20% of income.")
+    elif status == 'acceptable':
+        insights.append("📈 Your savings rate is decent but could be improved.")
+        recommendations.append("Aim for 20-30% savings rate for better financial security.")
+    else:
+        insights.append("✅ Excellent savings rate! You're on track for good financial health.")
+
+    for check in budget['categories']:
+        if check['over_limit'] and check['guideline'] in CATEGORY_INSIGHTS:
+            insight, recommendation = CATEGORY_INSIGHTS[check['guideline']]
+            insights.append(insight.format(ratio=check['ratio']))
+            recommendations.append(recommendation)
+
+    return insights, recommendations
+
+
+def budget_context(budget):
+    """One-line summary of a budget for the chat model's prompt"""
+    return (f"User's budget data: Income ₹{budget['income']:,}, "
+            f"Expenses ₹{budget['total_expenses']:,}, Savings ₹{budget['savings']:,}")
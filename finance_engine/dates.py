@@ -0,0 +1,83 @@
+"""
+Fast date parsing for bank statement exports
+
+pd.to_datetime without a format guesses the format from the first value
+and silently turns rows in any other format into NaT; with format='mixed'
+it falls back to parsing every value on its own. Statements repeat the same
+few thousand dates over millions of rows, so here each distinct string is
+parsed once, with an explicit format sniffed from a sample, and mixed-format
+columns are parsed one format group at a time.
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import INGEST_CONFIG
+from uniques import map_uniques, resolve_cached
+
+
+def sniff_format(values, formats=None):
+    """Return the candidate format that parses the most of `values`, or None"""
+    formats = formats or INGEST_CONFIG['date_formats']
+    best, best_parsed = None, 0
+    for date_format in formats:
+        parsed = pd.to_datetime(values, format=date_format, errors='coerce').notna().sum()
+        if parsed > best_parsed:
+            best, best_parsed = date_format, parsed
+            if parsed == len(values):
+                break
+    return best
+
+
+class DateParser:
+    """Parses date columns with sniffed explicit formats, caching every distinct string.
+
+    The cache lives as long as the parser, so the chunks of one upload share
+    it. Formats that matched earlier are tried first on later chunks.
+    """
+
+    def __init__(self, formats=None, sample_size=None, cache_size=None):
+        self.formats = list(formats or INGEST_CONFIG['date_formats'])
+        self.sample_size = sample_size or INGEST_CONFIG['date_sample_size']
+        self.cache_size = cache_size or INGEST_CONFIG['date_cache_size']
+        self.matched_formats = []
+        self._cache = {}
+
+    def parse(self, values):
+        """Parse a Series of date strings to datetime64; unparseable values become NaT"""
+        values = pd.Series(values)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+
+        parsed = map_uniques(values.astype(str).where(values.notna()), self._resolve, np.datetime64('NaT', 'ns'),
+                             'datetime64[ns]')
+        return pd.Series(parsed, index=values.index, name=values.name)
+
+    def _resolve(self, strings):
+        return resolve_cached(self._cache, strings, lambda unknown: self._parse_unique(pd.Index(unknown)),
+                              self.cache_size)
+
+    def _parse_unique(self, strings):
+        """Parse distinct strings one sniffed format group at a time"""
+        result = pd.Series(pd.NaT, index=strings, dtype='datetime64[ns]')
+        remaining = strings
+        candidates = self.matched_formats + [f for f in self.formats if f not in self.matched_formats]
+        while len(remaining) and candidates:
+            # An evenly spaced sample, so a format used only in part of the file is still seen
+            sample = remaining[np.unique(np.linspace(0, len(remaining) - 1, self.sample_size).astype(int))]
+            date_format = sniff_format(sample, candidates)
+            if date_format is None:
+                break
+            candidates.remove(date_format)
+            parsed = pd.to_datetime(remaining, format=date_format, errors='coerce')
+            matched = ~pd.isna(parsed)
+            result[remaining[matched]] = parsed[matched]
+            remaining = remaining[~matched]
+            if date_format not in self.matched_formats:
+                self.matched_formats.append(date_format)
+        return result.to_numpy()
+
+
+def parse_dates(values, formats=None):
+    """Parse a column of date strings with a one-off DateParser"""
+    return DateParser(formats).parse(values)
@@ -0,0 +1,97 @@
+"""
+Row keys for recognising transactions that were already uploaded
+
+A row's key hashes its normalized date, amount in paise, category and (if
+mapped) description. Identical rows within one statement are real repeat
+transactions (two auto rides on the same day), so each repeat is also
+numbered: re-uploading the statement reproduces the same keys, while the
+repeats stay distinct from each other.
+"""
+
+import numpy as np
+import pandas as pd
+
+from uniques import map_uniques
+
+# Odd 64-bit constant that spreads occurrence numbers across the key space
+_OCCURRENCE_STEP = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_text(values):
+    """Lower-case and collapse whitespace, computed once per distinct value"""
+    return map_uniques(values, lambda uniques: [" ".join(str(value).lower().split()) for value in uniques], "")
+
+
+def row_hashes(transactions):
+    """uint64 hash per cleaned transaction row, ignoring case and spacing in text"""
+    columns = {
+        'date': transactions['Date'].to_numpy().astype('datetime64[D]').view(np.int64),
+        'amount': np.rint(transactions['Amount'].to_numpy(dtype=np.float64) * 100).astype(np.int64),
+        'category': normalize_text(transactions['Category'])
+    }
+    if 'Description' in transactions:
+        columns['description'] = normalize_text(transactions['Description'])
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+class OccurrenceCounter:
+    """Numbers repeated row hashes across the chunks of one upload"""
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._counts = np.empty(0, dtype=np.int64)
+
+    def keys(self, hashes):
+        """Return row keys: the hash itself for a first occurrence, mixed with n for the n-th repeat"""
+        within = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+        occurrence = within + self._earlier(hashes)
+        self._record(hashes)
+        return np.where(occurrence == 0, hashes, hashes + occurrence.astype(np.uint64) * _OCCURRENCE_STEP)
+
+    def _earlier(self, hashes):
+        if not len(self._hashes):
+            return np.zeros(len(hashes), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+        return np.where(self._hashes[positions] == hashes, self._counts[positions], 0)
+
+    def _record(self, hashes):
+        unique, counts = np.unique(hashes, return_counts=True)
+        merged, inverse = np.unique(np.concatenate([self._hashes, unique]), return_inverse=True)
+        self._counts = np.bincount(inverse, weights=np.concatenate([self._counts, counts]),
+                                   minlength=len(merged)).astype(np.int64)
+        self._hashes = merged
+
+
+def row_keys(transactions):
+    """Row keys for a single cleaned frame"""
+    return OccurrenceCounter().keys(row_hashes(transactions))
+
+
+class RowKeySet:
+    """Sorted set of row keys already in a history (8 bytes per row).
+
+    It lives next to the history it describes (the session's expense history
+    in the apps), so the two are replaced and cleared together.
+    """
+
+    def __init__(self, keys=None):
+        self._keys = np.unique(np.asarray(keys, dtype=np.uint64)) if keys is not None \
+            else np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def nbytes(self):
+        return self._keys.nbytes
+
+    def contains(self, keys):
+        """Boolean mask of which keys are already in the set"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(self._keys):
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return self._keys[positions] == keys
+
+    def add(self, keys):
+        self._keys = np.union1d(self._keys, np.asarray(keys, dtype=np.uint64))
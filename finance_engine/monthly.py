@@ -0,0 +1,69 @@
+"""
+Month-by-month expense summaries and insights
+"""
+
+from datetime import datetime
+
+
+def summarize_month(month, expenses):
+    """Summarize one month's {category: amount} expenses, ignoring empty categories.
+
+    Returns None when no category has a positive amount.
+    """
+    expenses = {category: amount for category, amount in expenses.items() if amount > 0}
+    if not expenses:
+        return None
+
+    total = sum(expenses.values())
+    top_category = max(expenses, key=expenses.get)
+    return {
+        'month': month,
+        'expenses': expenses,
+        'total': total,
+        'average': total / len(expenses),
+        'top_category': top_category,
+        'top_amount': expenses[top_category],
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+
+
+def monthly_breakdown(analysis):
+    """Return (category, amount, percent of total) rows, largest first"""
+    total = analysis['total']
+    return [(category, amount, amount / total * 100 if total else 0)
+            for category, amount in sorted(analysis['expenses'].items(), key=lambda item: item[1], reverse=True)]
+
+
+def monthly_insights(analysis):
+    """Return (insights, recommendations) text for a summarize_month() result"""
+    expenses = analysis['expenses']
+    if not expenses:
+        return [], []
+
+    total = analysis['total']
+    top_category, top_amount = analysis['top_category'], analysis['top_amount']
+    insights = [f"🔝 **{top_category}** is your highest expense at ₹{top_amount:,} ({top_amount / total * 100:.1f}% of total)"]
+
+    # Check for balanced spending
+    if len(expenses) > 1:
+        average = total / len(expenses)
+        if any(amount > average * 2 for amount in expenses.values()):
+            insights.append("⚖️ **Unbalanced spending** detected - some categories are significantly higher than others")
+        else:
+            insights.append("✅ **Balanced spending** across categories")
+
+    if total > 0:
+        if len(expenses) <= 3:
+            insights.append("📊 **Focused spending** - You track expenses in few categories")
+        elif len(expenses) > 6:
+            insights.append("📈 **Diverse spending** - You have expenses across many categories")
+
+    recommendations = []
+    if top_amount / total > 0.4:
+        recommendations.append(f"Consider reducing spending in **{top_category}** as it takes up a large portion of your budget")
+    if len(expenses) > 8:
+        recommendations.append("Try consolidating similar expense categories for better tracking")
+    recommendations.append("Set monthly limits for each category to stay within budget")
+    recommendations.append("Review and update your categories monthly to reflect changing spending patterns")
+
+    return insights, recommendations
@@ -0,0 +1,125 @@
+"""
+Pluggable CSV parsers for statement uploads
+
+Every parser reads a binary file object and yields DataFrame chunks of the
+requested columns:
+
+- "c": the pandas C engine, the default
+- "pyarrow": pyarrow's multithreaded streaming reader, for large files when
+  pyarrow is installed
+- "python": the standard library csv module, slow but tolerant of ragged
+  rows and bad bytes; used when the faster parsers reject a file
+"""
+
+import csv
+import io
+
+import pandas as pd
+
+import backends
+from config import INGEST_CONFIG
+
+backends.registry.register("pyarrow", "pyarrow.csv")
+
+
+def read_c(source, usecols, chunk_size):
+    """Chunks from the pandas C engine"""
+    yield from pd.read_csv(source, usecols=usecols, chunksize=chunk_size, engine='c')
+
+
+def read_pyarrow(source, usecols, chunk_size):
+    """Chunks from pyarrow's streaming reader, one per block of the file.
+
+    Columns are read as strings and each block's columns are then made
+    numeric where every value allows it, like the C engine does per chunk;
+    pyarrow's own inference fixes types from the first block and fails on a
+    stray bad value further down.
+    """
+    pa_csv = backends.load("pyarrow")
+    import pyarrow as pa
+
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=INGEST_CONFIG['pyarrow_block_bytes']),
+        convert_options=pa_csv.ConvertOptions(include_columns=usecols,
+                                              column_types={column: pa.string() for column in usecols})
+    )
+    for batch in reader:
+        yield pd.DataFrame({name: _numeric_or_string(column, pa).to_pandas()
+                            for name, column in zip(batch.schema.names, batch.columns)})
+
+
+def _numeric_or_string(column, pa):
+    # A failed cast scans the whole column, so only columns that start with a number are tried
+    head = column.slice(0, 100).drop_null()
+    try:
+        float(head[0].as_py())
+    except (IndexError, ValueError):
+        return column
+    for numeric in (pa.int64(), pa.float64()):
+        try:
+            return column.cast(numeric)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return column
+
+
+def read_python(source, usecols, chunk_size):
+    """Chunks from the csv module; short rows are padded and undecodable bytes replaced"""
+    text = io.TextIOWrapper(source, encoding='utf-8', errors='replace', newline='')
+    try:
+        reader = csv.reader(text)
+        header = next(reader, [])
+        missing = [column for column in usecols if column not in header]
+        if missing:
+            raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+        positions = [header.index(column) for column in usecols]
+
+        columns = [[] for _ in usecols]
+        for row in reader:
+            if not row:
+                continue
+            for values, position in zip(columns, positions):
+                values.append(row[position] if position < len(row) else None)
+            if len(columns[0]) >= chunk_size:
+                yield pd.DataFrame(dict(zip(usecols, columns)))
+                columns = [[] for _ in usecols]
+        if columns[0]:
+            yield pd.DataFrame(dict(zip(usecols, columns)))
+    finally:
+        # Hand the file back open, so the caller can still seek and close it
+        text.detach()
+
+
+PARSERS = {
+    "c": read_c,
+    "pyarrow": read_pyarrow,
+    "python": read_python
+}
+
+
+def parse_errors():
+    """Exceptions meaning a parser could not read the file (rather than a bug or bad mapping)"""
+    errors = (pd.errors.ParserError, UnicodeDecodeError)
+    if backends.registry.is_loaded("pyarrow"):
+        import pyarrow as pa
+        errors += (pa.ArrowInvalid,)
+    return errors
+
+
+def available_parsers():
+    return [name for name in PARSERS if name != "pyarrow" or backends.is_available("pyarrow")]
+
+
+def choose_parser(size):
+    """Pick a parser for a file of `size` bytes (None if unknown)"""
+    if size is not None and size >= INGEST_CONFIG['pyarrow_min_bytes'] and backends.is_available("pyarrow"):
+        return "pyarrow"
+    return "c"
+
+
+def read_chunks(source, usecols, chunk_size, parser):
+    """Yield DataFrame chunks of `usecols` from a binary file object with the named parser"""
+    if parser not in PARSERS:
+        raise KeyError(f"Unknown CSV parser: {parser}")
+    return PARSERS[parser](source, usecols, chunk_size)
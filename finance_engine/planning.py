@@ -0,0 +1,69 @@
+"""
+Forward-looking tools: SIP projections, savings goals and what-if scenarios
+"""
+
+from datetime import datetime
+
+from config import INVESTMENT_PROFILES
+from utils import calculate_investment_projection
+
+
+def sip_plan(monthly_amount, years, risk_tolerance):
+    """Project a monthly SIP at the expected return for a risk tolerance.
+
+    Unknown risk tolerances are treated as aggressive. The result carries the
+    projection from utils.calculate_investment_projection plus the expected
+    return and the suggested (percent, asset) allocation.
+    """
+    profile = INVESTMENT_PROFILES.get(risk_tolerance, INVESTMENT_PROFILES['aggressive'])
+    plan = calculate_investment_projection(monthly_amount, profile['expected_return'], years, at_start=True)
+    plan['expected_return'] = profile['expected_return']
+    plan['allocation'] = profile['allocation']
+    return plan
+
+
+def new_goal(name, target, monthly_savings, priority):
+    """Create a savings goal record"""
+    return {
+        'name': name,
+        'target': target,
+        'monthly_savings': monthly_savings,
+        'current_saved': 0,
+        'priority': priority,
+        'months_needed': target / monthly_savings if monthly_savings > 0 else float('inf'),
+        'created_date': datetime.now().strftime("%Y-%m-%d")
+    }
+
+
+def goal_progress(goal):
+    """Return the progress fraction, remaining amount and months left for a goal"""
+    remaining = max(goal['target'] - goal['current_saved'], 0)
+    return {
+        'progress': min(goal['current_saved'] / goal['target'], 1.0) if goal['target'] > 0 else 1.0,
+        'remaining': remaining,
+        'months_remaining': remaining / goal['monthly_savings'] if goal['monthly_savings'] > 0 else float('inf')
+    }
+
+
+def simulate_what_if(income, income_change_pct=0, expense_reduction_pct=0, budget=None):
+    """Project savings for a change in income and a cut in expenses.
+
+    The income and expense scenarios are applied separately, each against the
+    current budget; without a budget only the new income is returned.
+    """
+    new_income = income * (1 + income_change_pct / 100)
+    scenario = {'new_income': new_income}
+    if not budget:
+        return scenario
+
+    current_expenses = budget['total_expenses']
+    new_savings = new_income - current_expenses
+    new_expenses = current_expenses * (1 - expense_reduction_pct / 100)
+    scenario.update({
+        'new_savings': new_savings,
+        'savings_change': new_savings - budget['savings'],
+        'new_expenses': new_expenses,
+        'expense_savings': current_expenses - new_expenses,
+        'additional_savings': income - new_expenses - budget['savings']
+    })
+    return scenario
@@ -0,0 +1,190 @@
+"""
+Columnar, memory-compact store for uploaded transactions
+
+One dict per transaction costs several hundred bytes of Python objects. Here
+each transaction is one slot in four NumPy arrays: the amount in integer
+paise (int32 while every amount fits, else int64), a small-integer category
+code into a shared list of names, the date as int32 days since 1970 and a
+uint64 dedup key: about 17 bytes per row, 8 of them the dedup key.
+"""
+
+import numpy as np
+import pandas as pd
+
+from finance_engine.dedup import row_keys
+
+PAISE_PER_RUPEE = 100
+NO_DATE = np.iinfo(np.int32).min  # Day number stored for a missing date
+
+
+def _compact_paise(paise):
+    """int64 paise as int32 if every amount fits (up to about ₹2.1 crore)"""
+    limit = np.iinfo(np.int32).max
+    if not len(paise) or np.abs(paise).max() < limit:
+        return paise.astype(np.int32)
+    return paise
+
+
+def _days(dates):
+    """datetime64 values as int32 days since 1970, NO_DATE where missing"""
+    dates = np.asarray(dates).astype('datetime64[D]')
+    return np.where(np.isnat(dates), NO_DATE, dates.view(np.int64)).astype(np.int32)
+
+
+def _day(timestamp):
+    return int(np.datetime64(pd.Timestamp(timestamp), 'D').astype(np.int64))
+
+
+def _code_dtype(categories):
+    """Smallest signed integer type for codes into `categories`, with -1 for missing"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if len(categories) < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class TransactionStore:
+    """Transactions held as columns: paise amounts, category codes and dates.
+
+    Queries return aggregates or a filtered store rather than rows, so
+    callers never materialize per-transaction Python objects. Each row also
+    carries its dedup key (see finance_engine.dedup).
+    """
+
+    def __init__(self, amounts, codes, categories, dates, keys):
+        self._amounts = amounts        # int32 or int64 paise
+        self._codes = codes            # index into categories, -1 = no category
+        self.categories = categories   # category names, in code order
+        self._days = dates             # int32 days since 1970, NO_DATE = no date
+        self.keys = keys               # uint64 row keys
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, np.int32), np.empty(0, np.int8), [], np.empty(0, np.int32),
+                   np.empty(0, np.uint64))
+
+    @classmethod
+    def from_frame(cls, transactions, keys=None):
+        """Build a store from a cleaned frame with Amount, Category and Date columns.
+
+        `keys` are the rows' dedup keys; by default they are computed from this
+        frame alone.
+        """
+        amounts = _compact_paise(
+            np.rint(transactions['Amount'].to_numpy(dtype=np.float64) * PAISE_PER_RUPEE).astype(np.int64)
+        )
+        categorical = pd.Categorical(transactions['Category'])
+        categories = [str(category) for category in categorical.categories]
+        codes = categorical.codes.astype(_code_dtype(categories))
+        dates = _days(pd.to_datetime(transactions['Date'], errors='coerce').to_numpy())
+        return cls(amounts, codes, categories, dates, row_keys(transactions) if keys is None else keys)
+
+    @classmethod
+    def concat(cls, stores):
+        """Combine stores into one, merging their category lists"""
+        stores = list(stores)
+        if not stores:
+            return cls.empty()
+
+        positions = {}
+        for store in stores:
+            for category in store.categories:
+                positions.setdefault(category, len(positions))
+        code_dtype = _code_dtype(positions)
+
+        codes = []
+        for store in stores:
+            # The trailing -1 keeps missing categories (code -1) missing
+            mapping = np.array([positions[category] for category in store.categories] + [-1], dtype=code_dtype)
+            codes.append(mapping[store._codes])
+        return cls(
+            np.concatenate([store._amounts for store in stores]),
+            np.concatenate(codes).astype(code_dtype),
+            list(positions),
+            np.concatenate([store._days for store in stores]),
+            np.concatenate([store.keys for store in stores])
+        )
+
+    def __len__(self):
+        return len(self._amounts)
+
+    @property
+    def amounts(self):
+        """Amounts in rupees"""
+        return self._amounts / PAISE_PER_RUPEE
+
+    @property
+    def dates(self):
+        """Dates as datetime64[D], NaT where missing"""
+        dates = self._days.astype('datetime64[D]')
+        dates[self._days == NO_DATE] = np.datetime64('NaT')
+        return dates
+
+    def total(self):
+        """Sum of all amounts in rupees"""
+        return int(self._amounts.sum(dtype=np.int64)) / PAISE_PER_RUPEE
+
+    def by_category(self):
+        """Total per category in rupees, largest first"""
+        present = self._codes >= 0
+        sums = np.bincount(self._codes[present], weights=self._amounts[present], minlength=len(self.categories))
+        return pd.Series(sums / PAISE_PER_RUPEE, index=self.categories, dtype='float64').sort_values(ascending=False)
+
+    def monthly_totals(self):
+        """Total per calendar month in rupees, oldest first, for transactions with a date"""
+        dated = self._days != NO_DATE
+        months, inverse = np.unique(self._days[dated].astype('datetime64[D]').astype('datetime64[M]'),
+                                    return_inverse=True)
+        sums = np.bincount(inverse, weights=self._amounts[dated], minlength=len(months))
+        return pd.Series(sums / PAISE_PER_RUPEE, index=pd.PeriodIndex(months, freq='M'), dtype='float64')
+
+    def filter(self, category=None, start=None, end=None):
+        """Return the transactions in a category and/or dated within [start, end]"""
+        mask = np.ones(len(self), dtype=bool)
+        if category is not None:
+            code = self.categories.index(category) if category in self.categories else -2
+            mask &= self._codes == code
+        if start is not None:
+            mask &= self._days >= _day(start)
+        if end is not None:
+            # NO_DATE sorts before every day, so undated rows are excluded explicitly
+            mask &= (self._days <= _day(end)) & (self._days != NO_DATE)
+        return self.select(mask)
+
+    def select(self, mask):
+        """Return the rows where a boolean mask is True"""
+        return TransactionStore(self._amounts[mask], self._codes[mask], self.categories, self._days[mask],
+                                self.keys[mask])
+
+    def append_new(self, upload, seen):
+        """Append the rows of `upload` whose keys are not in the RowKeySet `seen`.
+
+        Adds the appended keys to `seen` and returns (combined store, rows added).
+        """
+        new = ~seen.contains(upload.keys)
+        added = upload.select(new)
+        seen.add(added.keys)
+        return TransactionStore.concat([self, added]), len(added)
+
+    def to_frame(self):
+        """Materialize as a DataFrame (categorical Category, float Amount in rupees)"""
+        return pd.DataFrame({
+            'Amount': self.amounts,
+            'Category': pd.Categorical.from_codes(self._codes, categories=self.categories),
+            'Date': self.dates.astype('datetime64[ns]')
+        })
+
+    def memory_usage(self):
+        """Bytes held per column, and in total"""
+        usage = {
+            'Amount': self._amounts.nbytes,
+            'Category': self._codes.nbytes + sum(len(category) for category in self.categories),
+            'Date': self._days.nbytes,
+            'Key': self.keys.nbytes
+        }
+        usage['total'] = sum(usage.values())
+        return usage
+
+    @property
+    def nbytes(self):
+        return self.memory_usage()['total']
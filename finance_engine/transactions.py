@@ -0,0 +1,222 @@
+"""
+Cleaning and summarizing uploaded expense transactions
+
+Statements are read in chunks: each chunk is cleaned, folded into running
+totals and discarded, so memory is bounded by the chunk size rather than
+the file size.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from categories import get_description_categorizer, normalize_categories
+from config import INGEST_CONFIG
+from finance_engine.dates import DateParser
+from finance_engine.dedup import OccurrenceCounter, row_hashes
+from finance_engine.parsers import choose_parser, parse_errors, read_chunks
+from finance_engine.store import TransactionStore
+
+TOP_CATEGORIES = 5
+
+
+def clean_transactions(df, amount_col, category_col, date_col, date_parser=None, description_col=None):
+    """Select the mapped columns as Amount, Category, Date and optionally
+    Description, and drop unusable rows.
+
+    Amounts that are not numeric are dropped; unparseable dates become NaT.
+    Amounts are float32 when that is exact to the paisa, and Category (and
+    Description) are categoricals. With a description column, rows without a
+    category (every row, if `category_col` is None) are categorized from
+    their description. Pass one DateParser for all chunks of a file to share its
+    format sniffing and date cache. Returns (cleaned DataFrame, number of
+    rows dropped).
+    """
+    if category_col is None and description_col is None:
+        raise ValueError("Map a category column or a description column to categorize from")
+    columns = {'Amount': amount_col, 'Category': category_col, 'Date': date_col, 'Description': description_col}
+    columns = {name: column for name, column in columns.items() if column is not None}
+    cleaned = df[list(columns.values())].copy()
+    cleaned.columns = list(columns)
+    if category_col is None:
+        cleaned.insert(1, 'Category', np.nan)
+    cleaned['Amount'] = compact_amounts(pd.to_numeric(cleaned['Amount'], errors='coerce'))
+    cleaned['Category'] = cleaned['Category'].astype('category')
+    if description_col is not None:
+        cleaned['Description'] = cleaned['Description'].astype('category')
+        cleaned['Category'] = get_description_categorizer().fill(cleaned['Category'], cleaned['Description'])
+    cleaned['Date'] = (date_parser or DateParser()).parse(cleaned['Date'])
+
+    initial_rows = len(cleaned)
+    cleaned = cleaned.dropna(subset=['Amount'])
+    return cleaned, initial_rows - len(cleaned)
+
+
+def compact_amounts(amounts):
+    """Downcast rupee amounts to float32 if every value still rounds to the same paisa"""
+    amounts = amounts.astype('float64')
+    narrow = amounts.astype('float32')
+    paise = amounts.to_numpy() * 100
+    if np.array_equal(np.rint(narrow.to_numpy(dtype='float64') * 100), np.rint(paise), equal_nan=True):
+        return narrow
+    return amounts
+
+
+def bytes_per_row(df):
+    """Memory held by a DataFrame per row, including string contents"""
+    return df.memory_usage(deep=True, index=False).sum() / len(df) if len(df) else 0.0
+
+
+class TransactionTotals:
+    """Running aggregates over cleaned transactions, updated one chunk at a time"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.dropped = 0
+        self.min = None
+        self.max = None
+        self.first_date = None
+        self.last_date = None
+        self.frame_bytes = 0
+        self.parser = None
+        self.by_category = pd.Series(dtype='float64')
+        self.by_guideline = pd.Series(dtype='float64')
+
+    def update(self, transactions, dropped=0):
+        """Fold a cleaned chunk into the totals"""
+        self.dropped += dropped
+        if not len(transactions):
+            return self
+
+        # Sums are accumulated in float64 even when the chunk holds float32
+        amounts = transactions['Amount'].astype('float64')
+        self.total += float(amounts.sum())
+        self.count += len(transactions)
+        self.frame_bytes += int(transactions.memory_usage(deep=True, index=False).sum())
+        self.min = _fold(min, self.min, float(amounts.min()))
+        self.max = _fold(max, self.max, float(amounts.max()))
+        dates = transactions['Date'].dropna()
+        if len(dates):
+            self.first_date = _fold(min, self.first_date, dates.min())
+            self.last_date = _fold(max, self.last_date, dates.max())
+
+        sums = amounts.groupby(transactions['Category'], observed=True).sum()
+        sums.index = sums.index.astype(object)
+        self.by_category = self.by_category.add(sums, fill_value=0)
+
+        # Bank labels vary, so the chunk is also totalled per FINANCIAL_GUIDELINES key
+        sums = amounts.groupby(normalize_categories(transactions['Category']), observed=True).sum()
+        sums.index = sums.index.astype(object)
+        self.by_guideline = self.by_guideline.add(sums, fill_value=0)
+        return self
+
+    def summary(self):
+        """Totals, per-category sums and the top categories"""
+        by_category = self.by_category.sort_values(ascending=False)
+        return {
+            'total': self.total,
+            'average': self.total / self.count if self.count else 0,
+            'min': self.min,
+            'max': self.max,
+            'count': self.count,
+            'dropped': self.dropped,
+            'bytes_per_row': self.frame_bytes / self.count if self.count else 0.0,
+            'parser': self.parser,
+            'first_date': self.first_date,
+            'last_date': self.last_date,
+            'by_category': by_category,
+            'by_guideline': self.by_guideline.sort_values(ascending=False),
+            'top_categories': [(category, amount, amount / self.total * 100 if self.total else 0)
+                               for category, amount in by_category.head(TOP_CATEGORIES).items()]
+        }
+
+
+def _fold(func, current, value):
+    return value if current is None else func(current, value)
+
+
+def summarize_transactions(transactions):
+    """Totals, per-category sums and the top categories of cleaned transactions"""
+    return TransactionTotals().update(transactions).summary()
+
+
+def read_preview(source, rows=None):
+    """Read the first rows of a CSV for display and column mapping, then rewind the source"""
+    preview = pd.read_csv(source, nrows=rows or INGEST_CONFIG['preview_rows'])
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return preview
+
+
+def stream_transactions(source, amount_col, category_col, date_col, description_col=None, chunk_size=None,
+                        keep_rows=None, on_progress=None, parser=None):
+    """Clean a CSV file (path or binary file object) chunk by chunk into running totals.
+
+    The cleaned rows are also kept, as a columnar TransactionStore with dedup
+    keys, while there are at most `keep_rows` of them; beyond that they are
+    discarded and only the totals are kept. The optional description column
+    feeds the dedup keys and categorizes rows without a category. `on_progress(fraction, rows)` is called after every
+    chunk with the share of the file read so far. `parser` names a
+    finance_engine.parsers backend; by default one is chosen by file size, and
+    a file the fast parsers reject is re-read with the python parser. Returns
+    (TransactionTotals, TransactionStore or None).
+    """
+    chunk_size = chunk_size or INGEST_CONFIG['chunk_size']
+    keep_rows = INGEST_CONFIG['history_max_rows'] if keep_rows is None else keep_rows
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return stream_transactions(f, amount_col, category_col, date_col, description_col,
+                                       chunk_size, keep_rows, on_progress, parser)
+
+    size = _file_size(source)
+    parser = parser or choose_parser(size)
+    start = source.tell()
+    # Only the mapped columns are parsed; the rest of each line is skipped by the parser
+    usecols = list(dict.fromkeys(col for col in (amount_col, category_col, date_col, description_col) if col is not None))
+    try:
+        return _stream(source, size, parser, usecols, amount_col, category_col, date_col, description_col,
+                       chunk_size, keep_rows, on_progress)
+    except parse_errors():
+        if parser == 'python':
+            raise
+        source.seek(start)
+        return _stream(source, size, 'python', usecols, amount_col, category_col, date_col, description_col,
+                       chunk_size, keep_rows, on_progress)
+
+
+def _stream(source, size, parser, usecols, amount_col, category_col, date_col, description_col,
+            chunk_size, keep_rows, on_progress):
+    date_parser = DateParser()
+    occurrences = OccurrenceCounter()
+    totals = TransactionTotals()
+    totals.parser = parser
+    kept = []
+    rows = 0
+    for chunk in read_chunks(source, usecols, chunk_size, parser):
+        cleaned, dropped = clean_transactions(chunk, amount_col, category_col, date_col, date_parser, description_col)
+        totals.update(cleaned, dropped)
+        rows += len(chunk)
+
+        if kept is not None:
+            # Repeats are numbered across chunks, so keys match however the file is split
+            kept.append(TransactionStore.from_frame(cleaned, occurrences.keys(row_hashes(cleaned))))
+            if totals.count > keep_rows:
+                kept = None
+        if on_progress:
+            on_progress(min(source.tell() / size, 1.0) if size else 1.0, rows)
+
+    return totals, TransactionStore.concat(kept) if kept else None
+
+
+def _file_size(source):
+    """Size in bytes of a seekable file object, or None"""
+    try:
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
@@ -0,0 +1,309 @@
+"""
+Process-wide Gemini client pool for the Financial Assistant
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import backends
+from config import MODEL_CONFIG
+
+
+def hash_api_key(api_key):
+    """Hash an API key so raw keys are never used as cache keys"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+def make_flight_key(api_key, model_name, prompt):
+    """Key identifying an upstream request, used to coalesce identical calls"""
+    return hashlib.sha256(f"{hash_api_key(api_key)}\0{model_name}\0{prompt}".encode('utf-8')).hexdigest()
+
+
+# genai.configure() mutates global SDK state, so configuration is serialized
+_configure_lock = threading.Lock()
+
+
+def create_models(api_key, model_names, limit=None):
+    """Create Gemini models bound to an API key, skipping names the SDK rejects"""
+    genai = backends.load('gemini')
+    from google.generativeai import client as genai_client
+
+    models = []
+    with _configure_lock:
+        endpoint = MODEL_CONFIG['gemini_api_endpoint']
+        if endpoint:
+            genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': endpoint})
+        else:
+            genai.configure(api_key=api_key)
+
+        for model_name in model_names:
+            try:
+                model = genai.GenerativeModel(model_name)
+            except Exception:
+                continue
+            # Bind the transport now so a later configure() for another key
+            # cannot change which key this model sends requests with
+            model._client = genai_client.get_default_generative_client()
+            models.append((model_name, model))
+            if limit is not None and len(models) >= limit:
+                break
+    return models
+
+
+def is_key_rejection(error):
+    """Whether a request error means the key or model is rejected, rather than a transient failure"""
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return False
+    # The HTTP-status bases, as the REST transport raises these rather than the gRPC subclasses
+    return isinstance(error, (exceptions.BadRequest, exceptions.Unauthorized,
+                              exceptions.Forbidden, exceptions.NotFound))
+
+
+class ApiKeyValidator:
+    """Validate API keys by probing all models concurrently, caching verdicts with a TTL"""
+
+    def __init__(self, model_names, probe_timeout=5.0, ttl_seconds=900):
+        self.model_names = list(model_names)
+        self.probe_timeout = probe_timeout
+        self.ttl_seconds = ttl_seconds
+        self._verdicts = {}
+        self._lock = threading.Lock()
+
+    def validate(self, api_key):
+        """Return (is_valid, message, model_name), probing only on a cache miss"""
+        verdict = self.cached_verdict(api_key)
+        if verdict is None:
+            verdict, conclusive = self._probe_models(api_key)
+            # Timeouts say nothing about the key, so only conclusive verdicts are kept
+            if conclusive:
+                with self._lock:
+                    self._verdicts[hash_api_key(api_key)] = (time.monotonic() + self.ttl_seconds, verdict)
+        return verdict
+
+    def cached_verdict(self, api_key):
+        """Return the unexpired verdict for an API key, if any"""
+        key = hash_api_key(api_key)
+        with self._lock:
+            entry = self._verdicts.get(key)
+            if entry is None:
+                return None
+            expires_at, verdict = entry
+            if expires_at <= time.monotonic():
+                del self._verdicts[key]
+                return None
+            return verdict
+
+    def forget(self, api_key):
+        """Drop the cached verdict for an API key, so the next validation probes again"""
+        with self._lock:
+            self._verdicts.pop(hash_api_key(api_key), None)
+
+    def working_model(self, api_key):
+        """Return the model name a cached valid verdict found, if any"""
+        verdict = self.cached_verdict(api_key)
+        if verdict is not None and verdict[0]:
+            return verdict[2]
+        return None
+
+    def _probe_models(self, api_key):
+        """Probe every model in parallel and stop at the first success"""
+        models = create_models(api_key, self.model_names)
+        if not models:
+            return (False, "API key invalid or no compatible models found", None), True
+
+        deadline = time.monotonic() + self.probe_timeout
+        executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="gemini-probe")
+        futures = {executor.submit(self._probe, model): model_name for model_name, model in models}
+        pending = set(futures)
+        transient_error = None
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        if future.result():
+                            return (True, f"API key valid! Using model: {futures[future]}", futures[future]), True
+                    except Exception as e:
+                        # Quota, outage and network errors say nothing about the key
+                        if not is_key_rejection(e):
+                            transient_error = e
+        finally:
+            # Probes still in flight finish on their own request timeout
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if pending:
+            return (False, f"API key validation timed out after {self.probe_timeout:g}s", None), False
+        if transient_error is not None:
+            return (False, f"API key could not be checked right now: {transient_error}", None), False
+        return (False, "API key invalid or no compatible models found", None), True
+
+    def _probe(self, model):
+        """Send a minimal request with a hard deadline and no retries"""
+        response = model.generate_content(
+            "Hello",
+            request_options={'timeout': self.probe_timeout, 'retry': None}
+        )
+        return bool(response and response.text)
+
+
+class PooledClient:
+    """A configured Gemini model bound to a single API key"""
+
+    def __init__(self, model, model_name, api_key):
+        self.model = model
+        self.model_name = model_name
+        self.last_used = time.monotonic()
+        self._api_key = api_key
+        self._async_model = None
+
+    def async_model(self):
+        """Return a model with an asyncio transport; call from the event loop that uses it"""
+        if self._async_model is None:
+            genai = backends.load('gemini')
+            from google.ai import generativelanguage as glm
+
+            model = genai.GenerativeModel(self.model_name)
+            model._async_client = glm.GenerativeServiceAsyncClient(client_options={'api_key': self._api_key})
+            self._async_model = model
+        return self._async_model
+
+
+async def stream_content(client, prompt):
+    """Asynchronously yield response text chunks for a prompt"""
+    if MODEL_CONFIG['gemini_api_endpoint']:
+        # Custom endpoints use the REST transport, which the SDK only supports
+        # synchronously, so the blocking iterator is driven from the loop's executor
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, lambda: client.model.generate_content(prompt, stream=True))
+        chunks = iter(response)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                return
+            if chunk.text:
+                yield chunk.text
+    else:
+        response = await client.async_model().generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class GeminiClientPool:
+    """LRU pool of Gemini models keyed by API-key hash, with idle eviction"""
+
+    def __init__(self, model_names, max_size=32, idle_seconds=1800, validator=None):
+        self.model_names = list(model_names)
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.validator = validator
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes builds so concurrent first requests for a key build it once
+        self._build_lock = threading.Lock()
+
+    def get(self, api_key):
+        """Return the pooled client for an API key, building it on first use"""
+        key = hash_api_key(api_key)
+        client = self._lookup(key)
+        if client is not None:
+            return client
+
+        with self._build_lock:
+            client = self._lookup(key)
+            if client is None:
+                client = self._build(api_key)
+                with self._lock:
+                    self._clients[key] = client
+                    while len(self._clients) > self.max_size:
+                        self._clients.popitem(last=False)
+            return client
+
+    def discard(self, api_key):
+        """Drop the pooled client and cached verdict for an API key that was rejected after validation"""
+        with self._lock:
+            self._clients.pop(hash_api_key(api_key), None)
+        if self.validator is not None:
+            self.validator.forget(api_key)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def _lookup(self, key):
+        """Find a live client and mark it as recently used"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            client = self._clients.get(key)
+            if client is not None:
+                client.last_used = now
+                self._clients.move_to_end(key)
+            return client
+
+    def _evict_idle(self, now):
+        """Remove clients unused for longer than idle_seconds (oldest first)"""
+        while self._clients:
+            key, client = next(iter(self._clients.items()))
+            if now - client.last_used <= self.idle_seconds:
+                break
+            del self._clients[key]
+
+    def _build(self, api_key):
+        """Create the model for an API key, preferring the one validation found working"""
+        model_names = list(self.model_names)
+        if self.validator is not None:
+            working = self.validator.working_model(api_key)
+            if working in model_names:
+                model_names.remove(working)
+                model_names.insert(0, working)
+
+        models = create_models(api_key, model_names, limit=1)
+        if not models:
+            raise Exception("No compatible Gemini model found")
+        model_name, model = models[0]
+        return PooledClient(model, model_name, api_key)
+
+
+_pool = None
+_validator = None
+_singleton_lock = threading.Lock()
+
+
+def get_key_validator():
+    """Return the process-wide API key validator, creating it on first use"""
+    global _validator
+    if _validator is None:
+        with _singleton_lock:
+            if _validator is None:
+                _validator = ApiKeyValidator(
+                    MODEL_CONFIG['gemini_models'],
+                    probe_timeout=MODEL_CONFIG['key_probe_timeout'],
+                    ttl_seconds=MODEL_CONFIG['key_verdict_ttl']
+                )
+    return _validator
+
+
+def get_client_pool():
+    """Return the process-wide client pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        validator = get_key_validator()
+        with _singleton_lock:
+            if _pool is None:
+                _pool = GeminiClientPool(
+                    MODEL_CONFIG['gemini_models'],
+                    max_size=MODEL_CONFIG['client_pool_size'],
+                    idle_seconds=MODEL_CONFIG['client_idle_seconds'],
+                    validator=validator
+                )
+    return _pool
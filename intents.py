@@ -0,0 +1,84 @@
+"""
+Keyword intent classifier for the rule-based chat engine
+"""
+
+import re
+
+from config import INTENT_KEYWORDS
+
+
+class IntentClassifier:
+    """Scores every intent in a single regex scan of the input.
+
+    All keywords are compiled into one alternation, factored into a prefix
+    trie so each position is checked against a handful of branches. A keyword
+    matches a whole word, optionally with a common inflection ("invest" also
+    matches "investing", "tax" does not match "taxi"). Each match adds its
+    keyword's weight to its intent; the highest score wins, with ties going to
+    the intent listed first.
+    """
+
+    SUFFIXES = ("s", "es", "d", "ed", "ing", "ings", "ment", "ments", "r", "rs", "er", "ers", "or", "ors")
+
+    def __init__(self, intent_keywords, default="general"):
+        self.default = default
+        self.intents = list(intent_keywords)
+        self._keywords = {}
+        for intent, keywords in intent_keywords.items():
+            for keyword, weight in keywords.items():
+                self._keywords[keyword.lower()] = (intent, weight)
+
+        suffixes = "|".join(sorted(self.SUFFIXES, key=len, reverse=True))
+        # Input is lower-cased up front, which is much cheaper than re.IGNORECASE
+        self._pattern = re.compile(rf"\b({_trie_pattern(self._keywords)})(?:{suffixes})?\b")
+
+    def scores(self, text):
+        """Return the total keyword weight found for each intent"""
+        scores = {}
+        for keyword in self._pattern.findall(text.lower()):
+            intent, weight = self._keywords[keyword]
+            scores[intent] = scores.get(intent, 0) + weight
+        return scores
+
+    def classify(self, text, intents=None):
+        """Return the best intent for a text, or the default when nothing matches.
+
+        `intents` limits the answer to the intents a caller can respond to.
+        """
+        scores = self.scores(text)
+        if not scores:
+            return self.default
+        best, best_score = self.default, 0
+        for intent in self.intents:
+            score = scores.get(intent, 0)
+            if score > best_score and (intents is None or intent in intents):
+                best, best_score = intent, score
+        return best
+
+
+def _trie_pattern(words):
+    """Regex alternation for a set of words, with shared prefixes factored out"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ending here makes the rest of the branch optional
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+classifier = IntentClassifier(INTENT_KEYWORDS)
+
+
+def classify_intent(text, intents=None):
+    """Classify a chat message with the shared classifier"""
+    return classifier.classify(text, intents)
@@ -0,0 +1,179 @@
+"""
+Local CPU text-generation backend for offline answers
+"""
+
+import copy
+import threading
+
+import backends
+from config import MODEL_CONFIG
+from prompts import ADVISOR_PREFIX
+
+
+class LocalGenerator:
+    """Causal language model on CPU with optional int8 dynamic quantization"""
+
+    def __init__(self, model_name, quantize=True, num_threads=None, max_new_tokens=200,
+                 temperature=0.7, do_sample=True):
+        transformers = backends.load('transformers')
+        torch = backends.load('torch')
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.model_name = model_name
+        self.quantized = quantize
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.do_sample = do_sample
+        self.prefix_ids = None
+        self.prefix_cache = None
+
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        # Decoder-only models continue from the last position, so batches pad on the left
+        self.tokenizer.padding_side = 'left'
+
+        model = transformers.AutoModelForCausalLM.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = quantize_model(model)
+        self.model = model
+
+    def generate(self, prompt, max_new_tokens=None):
+        """Generate a reply to a prompt, returning only the new text"""
+        return self.generate_batch([prompt], max_new_tokens)[0]
+
+    def generate_batch(self, prompts, max_new_tokens=None):
+        """Generate replies to several prompts in one padded forward pass per token"""
+        torch = backends.load('torch')
+        inputs = self.encode(prompts)
+        kwargs = self.generation_kwargs(max_new_tokens)
+        if self.prefix_cache is not None:
+            kwargs['past_key_values'] = self.copy_prefix_cache(len(prompts))
+        with torch.inference_mode():
+            output = self.model.generate(**inputs, **kwargs)
+        new_tokens = output[:, inputs['input_ids'].shape[1]:]
+        return [text.strip() for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+    def count_tokens(self, text):
+        """Number of tokens the model's tokenizer produces for a text"""
+        return len(self.tokenizer(text)['input_ids'])
+
+    def set_prefix(self, prefix, cache=True):
+        """Prepend a fixed prefix to every prompt, computing its key/value cache once.
+
+        With a cached prefix only the per-request tokens are encoded on each call.
+        """
+        torch = backends.load('torch')
+        self.prefix_ids = self.tokenizer(prefix, return_tensors='pt')['input_ids']
+        self.prefix_cache = None
+        if cache:
+            with torch.inference_mode():
+                self.prefix_cache = self.model(self.prefix_ids, use_cache=True).past_key_values
+
+    def encode(self, prompts):
+        """Tokenize prompts (left-padded) behind the prefix, if one is set.
+
+        The padding sits between the prefix and each prompt, so every row shares
+        the prefix positions that the cached keys/values were computed for.
+        """
+        torch = backends.load('torch')
+        inputs = self.tokenizer(prompts, return_tensors='pt', padding=True)
+        if self.prefix_ids is None:
+            return inputs
+
+        prefix_ids = self.prefix_ids.expand(len(prompts), -1)
+        return {
+            'input_ids': torch.cat([prefix_ids, inputs['input_ids']], dim=1),
+            'attention_mask': torch.cat([torch.ones_like(prefix_ids), inputs['attention_mask']], dim=1),
+        }
+
+    def copy_prefix_cache(self, batch_size):
+        """A fresh copy of the prefix cache sized for a batch; generate() extends it in place"""
+        cache = copy.deepcopy(self.prefix_cache)
+        if batch_size == 1:
+            return cache
+        if hasattr(cache, 'batch_repeat_interleave'):
+            cache.batch_repeat_interleave(batch_size)
+            return cache
+        # Legacy tuple-of-tuples format from older transformers releases
+        return tuple(tuple(tensor.repeat_interleave(batch_size, dim=0) for tensor in layer) for layer in cache)
+
+    def generation_kwargs(self, max_new_tokens=None):
+        """Sampling settings shared by every generate() call"""
+        kwargs = {
+            'max_new_tokens': max_new_tokens or self.max_new_tokens,
+            'do_sample': self.do_sample,
+            'pad_token_id': self.tokenizer.pad_token_id,
+        }
+        if self.do_sample:
+            kwargs['temperature'] = self.temperature
+        return kwargs
+
+    def model_bytes(self):
+        """Size of the weights in bytes, counting packed int8 tensors of quantized layers"""
+        return sum(_tensor_bytes(value) for value in self.model.state_dict().values())
+
+
+def quantize_model(model):
+    """Apply int8 dynamic quantization to every linear layer of a model"""
+    torch = backends.load('torch')
+    _conv1d_to_linear(model)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _tensor_bytes(value):
+    """Bytes held by a tensor or by the (weight, bias) tuples of packed quantized params"""
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item) for item in value)
+    if hasattr(value, 'element_size'):
+        return value.element_size() * value.nelement()
+    return 0
+
+
+def _conv1d_to_linear(module):
+    """Swap GPT-2 style Conv1D layers (DialoGPT) for nn.Linear so they can be quantized"""
+    torch = backends.load('torch')
+    from transformers.pytorch_utils import Conv1D
+
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_local_generator():
+    """Load the configured local model once per process (primary, then fallback)"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                errors = []
+                for model_name in (MODEL_CONFIG['primary_model'], MODEL_CONFIG['fallback_model']):
+                    try:
+                        generator = LocalGenerator(
+                            model_name,
+                            quantize=MODEL_CONFIG['local_quantize'],
+                            num_threads=MODEL_CONFIG['local_num_threads'],
+                            max_new_tokens=MODEL_CONFIG['max_new_tokens'],
+                            temperature=MODEL_CONFIG['temperature'],
+                            do_sample=MODEL_CONFIG['do_sample']
+                        )
+                        generator.set_prefix(ADVISOR_PREFIX, cache=MODEL_CONFIG['local_prefix_cache'])
+                        _generator = generator
+                        break
+                    except Exception as e:
+                        errors.append(f"{model_name}: {e}")
+                else:
+                    raise RuntimeError("Could not load a local model - " + "; ".join(errors))
+    return _generator
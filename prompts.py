@@ -0,0 +1,42 @@
+"""
+Advisor prompt, split into a static prefix and a per-request suffix
+
+Everything that is the same for every request comes first, so backends can
+reuse the work done on it: the local model keeps the prefix's key/value
+cache, and the Gemini API can match the shared prefix across calls.
+"""
+
+ADVISOR_PREFIX = """You are a helpful and knowledgeable financial advisor. Provide personalized financial advice based on the user's profile and question.
+
+Please provide practical, actionable financial advice in a friendly and professional tone. Keep responses concise but informative. Use Indian currency (₹) and consider Indian financial context.
+
+Important: Always include a disclaimer that this is general advice and users should consult qualified financial professionals for personalized guidance.
+
+"""
+
+
+def build_request_suffix(user_input, user_profile, context="", history=""):
+    """The per-request part of the advisor prompt: profile, history, question and context"""
+    demographic = user_profile.get('demographic', 'general')
+    age = user_profile.get('age', 'unknown')
+    income = user_profile.get('income', 'unknown')
+    goals = user_profile.get('goals', 'general financial wellness')
+    if history:
+        history = f"Conversation so far:\n{history}\n\n"
+
+    return f"""User Profile:
+- Demographic: {demographic}
+- Age: {age}
+- Income: ₹{income}
+- Goals: {goals}
+
+{history}User Question: {user_input}
+
+Context: {context}
+
+Advice:"""
+
+
+def build_advisor_prompt(user_input, user_profile, context="", history=""):
+    """The full advisor prompt for backends that take a single string"""
+    return ADVISOR_PREFIX + build_request_suffix(user_input, user_profile, context, history)
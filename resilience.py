@@ -0,0 +1,204 @@
+"""
+Overload protection for upstream LLM calls
+"""
+
+import threading
+import time
+from collections import deque
+
+from config import MODEL_CONFIG
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an upstream call cannot start within its latency budget"""
+
+
+class CircuitOpen(Exception):
+    """Raised when the circuit breaker is skipping the upstream"""
+
+
+class TokenBucketLimiter:
+    """Process-wide token bucket with a bounded, per-session fair wait queue.
+
+    Callers reserve a token up front; when the bucket is empty the reservation
+    drives the balance negative and the caller sleeps until its token has been
+    refilled, so waiting callers are served in arrival order. A session may only
+    hold a limited number of queue slots, so one busy session cannot crowd out
+    everyone else.
+    """
+
+    def __init__(self, rate, burst, max_queue=50, max_queue_per_session=1):
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_queue_per_session = max_queue_per_session
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = {}
+        self._lock = threading.Lock()
+        self._stats = {'granted': 0, 'queued': 0, 'rejected': 0}
+
+    def acquire(self, session_id, budget):
+        """Take a token, waiting at most `budget` seconds; returns the time waited"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._stats['granted'] += 1
+                return 0.0
+
+            wait = (1 - self._tokens) / self.rate
+            if sum(self._waiting.values()) >= self.max_queue:
+                self._reject(f"Upstream queue is full ({self.max_queue} waiting)")
+            if self._waiting.get(session_id, 0) >= self.max_queue_per_session:
+                self._reject("This session already has a request waiting")
+            if wait > budget:
+                self._reject(f"Estimated wait {wait:.1f}s exceeds the {budget:.1f}s budget")
+
+            self._tokens -= 1
+            self._waiting[session_id] = self._waiting.get(session_id, 0) + 1
+            self._stats['queued'] += 1
+
+        try:
+            time.sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting[session_id] -= 1
+                if not self._waiting[session_id]:
+                    del self._waiting[session_id]
+                self._stats['granted'] += 1
+        return wait
+
+    def stats(self):
+        """Return grant/queue/reject counters and the current queue length"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['waiting'] = sum(self._waiting.values())
+        return stats
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reject(self, reason):
+        self._stats['rejected'] += 1
+        raise RateLimitExceeded(reason)
+
+
+class CircuitBreaker:
+    """Skips an upstream while its recent error rate or latency is too high.
+
+    Outcomes of the last `window` calls are kept. Once at least `min_calls` are
+    recorded, the circuit opens when the failure rate or the share of calls slower
+    than `slow_call_seconds` reaches its threshold. After `open_seconds` one trial
+    call is let through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window=20, min_calls=5, error_rate=0.5, slow_call_seconds=8.0,
+                 slow_rate=0.5, open_seconds=30):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._changed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """Check whether a new upstream call may start now"""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # Open: wait out the cool-down. Half-open: a trial is running, but if its
+            # outcome never arrives another trial is allowed after the same interval
+            if now - self._changed_at < self.open_seconds:
+                return False
+            self._state = self.HALF_OPEN
+            self._changed_at = now
+            return True
+
+    def record(self, latency, ok):
+        """Record a finished call's latency (seconds) and whether it succeeded"""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if ok and latency < self.slow_call_seconds:
+                    self._outcomes.clear()
+                    self._state = self.CLOSED
+                else:
+                    self._state = self.OPEN
+                self._changed_at = now
+                return
+
+            self._outcomes.append((latency, ok))
+            if self._state != self.CLOSED or len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+            slow = sum(1 for seconds, _ in self._outcomes if seconds >= self.slow_call_seconds)
+            if (failures / len(self._outcomes) >= self.error_rate
+                    or slow / len(self._outcomes) >= self.slow_rate):
+                self._state = self.OPEN
+                self._changed_at = now
+
+    def stats(self):
+        """Return the state and recent failure/slow-call rates"""
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+            slow = sum(1 for seconds, _ in self._outcomes if seconds >= self.slow_call_seconds)
+            return {
+                'state': self._state,
+                'calls': calls,
+                'error_rate': failures / calls if calls else 0.0,
+                'slow_rate': slow / calls if calls else 0.0,
+            }
+
+
+_limiter = None
+_breaker = None
+_singleton_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide limiter for upstream LLM calls"""
+    global _limiter
+    if _limiter is None:
+        with _singleton_lock:
+            if _limiter is None:
+                _limiter = TokenBucketLimiter(
+                    MODEL_CONFIG['rate_limit_per_second'],
+                    MODEL_CONFIG['rate_limit_burst'],
+                    max_queue=MODEL_CONFIG['rate_limit_queue'],
+                    max_queue_per_session=MODEL_CONFIG['rate_limit_queue_per_session']
+                )
+    return _limiter
+
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker for the Gemini path"""
+    global _breaker
+    if _breaker is None:
+        with _singleton_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    window=MODEL_CONFIG['breaker_window'],
+                    min_calls=MODEL_CONFIG['breaker_min_calls'],
+                    error_rate=MODEL_CONFIG['breaker_error_rate'],
+                    slow_call_seconds=MODEL_CONFIG['breaker_slow_seconds'],
+                    slow_rate=MODEL_CONFIG['breaker_slow_rate'],
+                    open_seconds=MODEL_CONFIG['breaker_open_seconds']
+                )
+    return _breaker
@@ -0,0 +1,206 @@
+"""
+Two-tier cache for chat answers: an in-memory LRU in front of SQLite on disk
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config import CACHE_CONFIG
+
+
+def normalize_question(question):
+    """Lower-case a question and strip punctuation and extra whitespace"""
+    question = re.sub(r"[^\w₹%\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+def income_band(income, bands=None):
+    """Bucket a monthly income into a band label such as '30000-60000'"""
+    bands = bands or CACHE_CONFIG['income_bands']
+    try:
+        income = float(income)
+    except (TypeError, ValueError):
+        return "unknown"
+
+    lower = 0
+    for upper in bands:
+        if income < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+
+def shared_profile(user_profile):
+    """The profile as a cacheable answer may see it: only the fields in its cache key, income as a band.
+
+    The exact income, age and free-text goals stay out of prompts whose
+    answers are shared with other users.
+    """
+    return {
+        'demographic': user_profile.get('demographic', 'general'),
+        'income': income_band(user_profile.get('income'))
+    }
+
+
+def make_cache_key(question, user_profile, risk_tolerance):
+    """Build a cache key from the normalized question and a bucketed profile"""
+    parts = [
+        normalize_question(question),
+        user_profile.get('demographic', 'general'),
+        income_band(user_profile.get('income')),
+        risk_tolerance,
+    ]
+    return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Memory LRU backed by a SQLite table, both with TTL; the disk tier is size-bounded"""
+
+    def __init__(self, path, memory_entries=256, ttl_seconds=86400, max_disk_bytes=50_000_000):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at)")
+        self._db.commit()
+        # Running totals of the disk tier, so stats() and puts never scan the whole table
+        self._disk_entries, self._disk_bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+    def get(self, key):
+        """Return a cached response or None, promoting disk hits into memory"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return response
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self._remember(key, row[1], row[0])
+                self._stats['disk_hits'] += 1
+                return row[0]
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key, response):
+        """Store a response in both tiers and enforce the disk size limit"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._remember(key, now, response)
+            replaced = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, now, now, size)
+            )
+            if replaced is None:
+                self._disk_entries += 1
+            else:
+                self._disk_bytes -= replaced[0]
+            self._disk_bytes += size
+            self._stats['stores'] += 1
+            self._evict_disk(now)
+            self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = self._disk_entries
+            stats['disk_bytes'] = self._disk_bytes
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._disk_entries, self._disk_bytes = 0, 0
+
+    def _remember(self, key, created_at, response):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        """Drop expired rows, then least recently used rows until under max_disk_bytes"""
+        expired_before = now - self.ttl_seconds
+        count, size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE created_at < ?", (expired_before,)
+        ).fetchone()
+        if count:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (expired_before,))
+            self._disk_entries -= count
+            self._disk_bytes -= size
+            self._stats['evictions'] += count
+
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            self._disk_entries -= 1
+            self._disk_bytes -= size
+            self._stats['evictions'] += 1
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    CACHE_CONFIG['response_cache_path'],
+                    memory_entries=CACHE_CONFIG['memory_entries'],
+                    ttl_seconds=CACHE_CONFIG['ttl_seconds'],
+                    max_disk_bytes=CACHE_CONFIG['max_disk_bytes']
+                )
+    return _cache
@@ -0,0 +1,167 @@
+"""
+Offline FAQ retrieval over hashed n-gram TF-IDF vectors
+
+The index is built once from the curated Q&A corpus, saved as .npy files and
+memory-mapped on load, so startup costs no parsing and lookups are a single
+vectorized dot product over the corpus.
+
+    python -m retrieval   # (re)build the index
+"""
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from config import RETRIEVAL_CONFIG
+from response_cache import normalize_question
+
+
+def extract_features(text):
+    """Word unigrams and bigrams plus character trigrams within words"""
+    words = normalize_question(text).split()
+    features = list(words)
+    features += [f"{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features += [f"#{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+
+def hash_features(features, dimensions):
+    """Map features to (indices, counts) in a fixed-size hashed vector"""
+    # crc32 is stable across processes, unlike hash(), so the saved index stays valid
+    indices = np.fromiter((zlib.crc32(feature.encode('utf-8')) % dimensions for feature in features),
+                          dtype=np.int64, count=len(features))
+    return np.unique(indices, return_counts=True)
+
+
+class FAQIndex:
+    """TF-IDF matrix over FAQ entries with cosine top-k search"""
+
+    def __init__(self, vectors, idf, entries):
+        self.vectors = vectors
+        self.idf = idf
+        self.entries = entries
+        self.dimensions = idf.shape[0]
+
+    @classmethod
+    def build(cls, entries, dimensions):
+        """Vectorize FAQ entries (question and tags); rows are L2-normalized"""
+        rows = [hash_features(extract_features(" ".join([entry['question']] + entry.get('tags', []))), dimensions)
+                for entry in entries]
+
+        document_frequency = np.zeros(dimensions, dtype=np.float32)
+        for indices, _ in rows:
+            document_frequency[indices] += 1
+        idf = (np.log((1 + len(entries)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        vectors = np.zeros((len(entries), dimensions), dtype=np.float32)
+        for row, (indices, counts) in enumerate(rows):
+            vectors[row, indices] = (1 + np.log(counts)) * idf[indices]
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return cls(vectors, idf, entries)
+
+    def save(self, index_dir, corpus_hash):
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, "vectors.npy"), self.vectors)
+        np.save(os.path.join(index_dir, "idf.npy"), self.idf)
+        with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({'corpus_hash': corpus_hash, 'dimensions': self.dimensions, 'entries': self.entries}, f)
+
+    @classmethod
+    def load(cls, index_dir):
+        """Open a saved index with the vectors memory-mapped"""
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode='r')
+        idf = np.load(os.path.join(index_dir, "idf.npy"))
+        return cls(vectors, idf, meta['entries']), meta
+
+    def search(self, query, top_k=3, min_score=0.0):
+        """Return up to top_k (score, entry) pairs, best first, scoring at least min_score"""
+        indices, counts = hash_features(extract_features(query), self.dimensions)
+        if not len(indices):
+            return []
+        weights = (1 + np.log(counts)) * self.idf[indices]
+        norm = np.linalg.norm(weights)
+        # Only the query's nonzero columns contribute to the dot product
+        scores = self.vectors[:, indices] @ (weights / norm)
+
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), self.entries[i]) for i in best if scores[i] >= min_score]
+
+
+def corpus_hash(path, dimensions):
+    """Fingerprint of the corpus file and vector size, to detect a stale index"""
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(str(dimensions).encode())
+    return digest.hexdigest()
+
+
+def build_index(faq_path, index_dir, dimensions):
+    """Build the index from the corpus file and save it to index_dir"""
+    with open(faq_path, encoding="utf-8") as f:
+        entries = json.load(f)
+    index = FAQIndex.build(entries, dimensions)
+    index.save(index_dir, corpus_hash(faq_path, dimensions))
+    return index
+
+
+def load_index(faq_path, index_dir, dimensions):
+    """Load the saved index, rebuilding it first if missing or out of date"""
+    expected = corpus_hash(faq_path, dimensions)
+    try:
+        index, meta = FAQIndex.load(index_dir)
+        if meta['corpus_hash'] == expected:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    build_index(faq_path, index_dir, dimensions)
+    return FAQIndex.load(index_dir)[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_faq_index():
+    """Return the process-wide FAQ index, loading (or building) it on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = load_index(
+                    RETRIEVAL_CONFIG['faq_path'],
+                    RETRIEVAL_CONFIG['index_dir'],
+                    RETRIEVAL_CONFIG['dimensions']
+                )
+    return _index
+
+
+def answer_from_faq(question):
+    """Return the best FAQ answer for a question, or None if nothing is close enough"""
+    hits = get_faq_index().search(
+        question,
+        top_k=RETRIEVAL_CONFIG['top_k'],
+        min_score=RETRIEVAL_CONFIG['min_score']
+    )
+    if not hits:
+        return None
+
+    answer = hits[0][1]['answer']
+    related = [entry['question'] for _, entry in hits[1:]]
+    if related:
+        answer += "\n\n**Related questions**:\n" + "\n".join(f'- "{question}"' for question in related)
+    return answer
+
+
+if __name__ == "__main__":
+    built = build_index(RETRIEVAL_CONFIG['faq_path'], RETRIEVAL_CONFIG['index_dir'], RETRIEVAL_CONFIG['dimensions'])
+    print(f"Indexed {len(built.entries)} FAQ entries into {RETRIEVAL_CONFIG['index_dir']}")
@@ -0,0 +1,90 @@
+"""
+Rule-based answer templates, rendered once per distinct input
+"""
+
+import string
+from functools import lru_cache
+
+from config import ANSWER_TEMPLATES
+
+# Template fields that depend on the user's income or age
+INCOME_FIELDS = {'income', 'sip', 'equity_amount', 'debt_amount', 'emergency_target', 'emergency_monthly'}
+AGE_FIELDS = {'age', 'equity_pct', 'debt_pct', 'equity_amount', 'debt_amount'}
+
+
+class _TemplateValues(dict):
+    """Format fields for an income and age; `share_N` is N% of the monthly income"""
+
+    def __init__(self, income, age):
+        income = income or 0
+        emergency_target = income * 0.7 * 6  # Assuming 70% of income goes to expenses
+        super().__init__(
+            income=income,
+            age=age,
+            sip=min(income * 0.1, 15000),
+            equity_pct=100 - age,
+            debt_pct=age,
+            equity_amount=income * (100 - age) / 100 * 0.2,
+            debt_amount=income * age / 100 * 0.2,
+            emergency_target=emergency_target,
+            emergency_monthly=emergency_target / 12
+        )
+
+    def __missing__(self, key):
+        if key.startswith('share_'):
+            return self['income'] * int(key[len('share_'):]) / 100
+        raise KeyError(key)
+
+
+class TemplateRegistry:
+    """Selects the most specific template for a request and memoizes rendered answers.
+
+    The cache key only carries the inputs a template actually uses, so e.g. the
+    student investment answers are rendered once for every income.
+    """
+
+    def __init__(self, templates, cache_size=1024):
+        self.templates = templates
+        self._fields = {
+            (intent, variant): {field.split('.')[0] for _, field, _, _ in string.Formatter().parse(text) if field}
+            for intent, variants in templates.items()
+            for variant, text in variants.items()
+        }
+        self._render = lru_cache(maxsize=cache_size)(self._format)
+
+    def variant(self, intent, demographic, risk_tolerance=None):
+        """Return the template key that applies, most specific first"""
+        variants = self.templates[intent]
+        for key in (f"{demographic}:{risk_tolerance}", demographic,
+                    f"default:{risk_tolerance}", "default"):
+            if key in variants:
+                return key
+        raise KeyError(f"No '{intent}' template for {demographic}")
+
+    def render(self, intent, demographic='general', risk_tolerance=None, income=0, age=25):
+        """Return the answer text for an intent and user profile"""
+        if intent not in self.templates:
+            intent = 'general'
+        variant = self.variant(intent, demographic, risk_tolerance)
+        fields = self._fields[(intent, variant)]
+        uses_income = bool(fields & INCOME_FIELDS) or any(field.startswith('share_') for field in fields)
+        return self._render(
+            intent,
+            variant,
+            income if uses_income else None,
+            age if fields & AGE_FIELDS else None
+        )
+
+    def cache_info(self):
+        return self._render.cache_info()
+
+    def _format(self, intent, variant, income, age):
+        return self.templates[intent][variant].format_map(_TemplateValues(income, age or 0))
+
+
+registry = TemplateRegistry(ANSWER_TEMPLATES)
+
+
+def render_answer(intent, demographic='general', risk_tolerance=None, income=0, age=25):
+    """Render a rule-based answer with the shared registry"""
+    return registry.render(intent, demographic, risk_tolerance, income, age)
@@ -0,0 +1,45 @@
+"""
+Per-distinct-value evaluation of large columns
+
+Upload columns repeat a few thousand distinct values (labels, dates,
+merchants) over millions of rows, so each distinct value is resolved once
+and the results are spread back over the rows with one take.
+"""
+
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+
+def map_uniques(values, resolve, missing, dtype=object):
+    """Map a column through `resolve(uniques)`, which returns one result per distinct value.
+
+    Missing values get `missing`. Plain lists are accepted too.
+    """
+    codes, uniques = pd.factorize(values if hasattr(values, 'dtype') else np.asarray(values, dtype=object))
+    resolved = np.array(list(resolve(uniques)) + [missing], dtype=dtype)
+    # Missing values have code -1, which picks the trailing `missing`
+    return resolved[codes]
+
+
+def resolve_cached(cache, keys, compute, max_size, lock=None):
+    """Results for distinct `keys`, computing those not in `cache` with `compute(list)` and caching them.
+
+    The batch's results are gathered locally, so clearing a full cache cannot
+    lose any of them. `lock` guards a cache shared between threads; compute()
+    runs outside it, so callers do not wait on each other's misses.
+    """
+    if lock is None:
+        lock = contextlib.nullcontext()
+    with lock:
+        known = {key: cache[key] for key in keys if key in cache}
+    unknown = [key for key in keys if key not in known]
+    if unknown:
+        computed = dict(zip(unknown, compute(unknown)))
+        known.update(computed)
+        with lock:
+            if len(cache) + len(computed) > max_size:
+                cache.clear()
+            cache.update(computed)
+    return [known[key] for key in keys]
@@ -0,0 +1,112 @@
+"""
+In-memory cache for parsed CSV uploads, keyed by file content and column mapping
+
+Every widget interaction reruns the script, so without this each rerun would
+parse the upload again. Entries are sized by their actual memory use and the
+least recently used ones are evicted beyond a byte budget.
+"""
+
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from config import CACHE_CONFIG
+
+
+def file_digest(data):
+    """Content hash of an upload's bytes (bytes, bytearray or memoryview)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def make_upload_key(digest, *parts):
+    """Cache key for a result derived from a file's content and e.g. a column mapping"""
+    return hashlib.sha256(json.dumps([digest, *parts]).encode('utf-8')).hexdigest()
+
+
+def value_bytes(value):
+    """Approximate memory held by a cached value, including DataFrame contents"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if hasattr(value, 'nbytes'):
+        # NumPy arrays and columnar stores report their own size
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(value_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(value_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class UploadCache:
+    """LRU of parsed upload results, bounded by total bytes"""
+
+    def __init__(self, max_bytes=256_000_000):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def get(self, key):
+        """Return a cached value or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries beyond max_bytes.
+
+        A value larger than the whole budget is not cached.
+        """
+        size = value_bytes(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (size, value)
+            self._bytes += size
+            self._stats['stores'] += 1
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._stats['evictions'] += 1
+
+    def stats(self):
+        """Return hit/miss counters, entry count and bytes held"""
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Remove every cached upload"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_upload_cache():
+    """Return the process-wide upload cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = UploadCache(CACHE_CONFIG['upload_cache_bytes'])
+    return _cache
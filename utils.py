@@ -6,7 +6,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import json
+import re
 from config import FINANCIAL_GUIDELINES, ERROR_MESSAGES
+from categories import get_category_normalizer
 
 class BudgetAnalyzer:
     """Class for budget analysis and financial calculations"""
@@ -34,33 +36,21 @@ class BudgetAnalyzer:
         except Exception as e:
             raise ValueError(ERROR_MESSAGES['calculation_error'])
     
+    @staticmethod
+    def guideline_key(category):
+        """Map an expense category label to its FINANCIAL_GUIDELINES expense ratio key"""
+        return get_category_normalizer().key(category)
+    
     @staticmethod
     def analyze_spending_patterns(expense_ratios):
         """Analyze spending patterns and identify issues"""
         guidelines = FINANCIAL_GUIDELINES['expense_ratios']
+        normalizer = get_category_normalizer()
         issues = []
         recommendations = []
         
         for category, ratio in expense_ratios.items():
-            category_key = category.lower().replace('/', '_').replace(' & ', '_').replace(' ', '_')
-            
-            # Map categories to guidelines
-            if 'rent' in category_key or 'housing' in category_key:
-                guideline_key = 'housing'
-            elif 'food' in category_key or 'groceries' in category_key:
-                guideline_key = 'food'
-            elif 'transport' in category_key:
-                guideline_key = 'transport'
-            elif 'entertainment' in category_key:
-                guideline_key = 'entertainment'
-            elif 'utilities' in category_key:
-                guideline_key = 'utilities'
-            elif 'shopping' in category_key:
-                guideline_key = 'shopping'
-            else:
-                guideline_key = 'others'
-            
-            recommended_ratio = guidelines.get(guideline_key, 10)
+            recommended_ratio = guidelines.get(normalizer.key(category), 10)
             
             if ratio > recommended_ratio:
                 issues.append({
@@ -166,6 +156,11 @@ class ResponseGenerator:
         
         return summary
 
+def stream_text(text):
+    """Yield text in word-sized chunks so canned answers stream like model output"""
+    for match in re.finditer(r'\s*\S+\s*', text):
+        yield match.group(0)
+
 def validate_financial_input(value, field_name, min_value=0, max_value=None):
     """Validate financial input values"""
     try:
@@ -196,8 +191,12 @@ def export_budget_data(budget_data, filename=None):
     except Exception as e:
         raise ValueError(f"Error exporting data: {str(e)}")
 
-def calculate_investment_projection(monthly_amount, annual_return_rate, years):
-    """Calculate investment projection using compound interest"""
+def calculate_investment_projection(monthly_amount, annual_return_rate, years, at_start=False):
+    """Calculate investment projection using compound interest
+    
+    With at_start=True each instalment is invested at the start of the month
+    (as with a SIP), so it earns one extra month of returns.
+    """
     try:
         monthly_rate = annual_return_rate / 12 / 100
         total_months = years * 12
@@ -206,6 +205,8 @@ def calculate_investment_projection(monthly_amount, annual_return_rate, years):
             future_value = monthly_amount * total_months
         else:
             future_value = monthly_amount * (((1 + monthly_rate) ** total_months - 1) / monthly_rate)
+            if at_start:
+                future_value *= 1 + monthly_rate
         
         total_invested = monthly_amount * total_months
         returns = future_value - total_invested